@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+"""benchmark the clustered transition relation of `ecco.rr.lts.LTS`
+
+For each model, the LTS is built with a monolithic transition relation
+(`cluster=0`) and with the requested cluster sizes, then the usual image and
+fixpoint computations are timed. Models are either RR files given on the
+command line, or synthetic models made of `--modules` chains of `--length`
+variables coupled with their neighbours.
+"""
+
+import argparse, pathlib, tempfile, time
+
+import ecco
+
+parser = argparse.ArgumentParser()
+parser.add_argument("-c", "--cluster", type=int, action="append", default=[],
+                    help="cluster size to be tested (may be repeated)")
+parser.add_argument("-m", "--modules", type=int, action="append", default=[],
+                    help="number of modules of a synthetic model (may be repeated)")
+parser.add_argument("-l", "--length", type=int, default=4,
+                    help="number of variables in each synthetic module")
+parser.add_argument("--compact", default=False, action="store_true",
+                    help="build compact LTS")
+parser.add_argument("model", metavar="PATH", type=str, nargs="*",
+                    default=[str(pathlib.Path(__file__).parent.parent
+                                 / "doc" / "termites.rr")],
+                    help="RR models to benchmark (default: doc/termites.rr)")
+args = parser.parse_args()
+
+def synthetic (path, modules, length) :
+    with open(path, "w") as out :
+        out.write("variables:\n")
+        for m in range(modules) :
+            for v in range(length) :
+                out.write(f"    M{m}V{v}{'+' if v == 0 else '-'}: module {m}\n")
+        out.write("constraints:\n")
+        for m in range(modules) :
+            out.write(f"    M{m}V{length-1}+ >> M{m}V0-\n")
+        out.write("rules:\n")
+        for m in range(modules) :
+            for v in range(length - 1) :
+                out.write(f"    M{m}V{v}+ >> M{m}V{v+1}+\n")
+                out.write(f"    M{m}V{v+1}+ >> M{m}V{v}-\n")
+            if m :
+                out.write(f"    M{m-1}V{length-1}+, M{m}V0- >> M{m}V0+\n")
+    return path
+
+def bench (model, cluster, compact) :
+    times = {}
+    start = time.perf_counter()
+    cg = model(compact=compact, split=False, cluster=cluster)
+    lts = cg.lts
+    times["build"] = time.perf_counter() - start
+    start = time.perf_counter()
+    lts.succ_s(lts.init)
+    times["succ_s"] = time.perf_counter() - start
+    start = time.perf_counter()
+    lts.pred_s(lts.dead | lts.hull)
+    times["pred_s"] = time.perf_counter() - start
+    start = time.perf_counter()
+    lts.succ_o(lts.states) & lts.pred_o(lts.states)
+    times["gfp"] = time.perf_counter() - start
+    return len(lts.states), len(lts.clusters), times
+
+def main () :
+    clusters = [0] + sorted(set(c for c in args.cluster if c > 0) or {4, 16})
+    with tempfile.TemporaryDirectory() as tmp :
+        paths = list(args.model)
+        for m in args.modules :
+            paths.append(synthetic(f"{tmp}/synth{m}x{args.length}.rr",
+                                   m, args.length))
+        print("model,cluster,clusters,states,build,succ_s,pred_s,gfp,total")
+        for path in paths :
+            _, model = ecco.load(path)
+            for cluster in clusters :
+                size, count, times = bench(model, cluster, args.compact)
+                print(f"{pathlib.Path(path).name},{cluster},{count},{size},"
+                      + ",".join(f"{t:.3f}" for t in times.values())
+                      + f",{sum(times.values()):.3f}")
+
+if __name__ == "__main__" :
+    main()
@@ -5,11 +5,16 @@ from . import load
 parser = argparse.ArgumentParser()
 parser.add_argument("-d", "--debug", action="store_true", default=False,
                     help="run in debug mode")
+parser.add_argument("-b", "--batch", metavar="RECIPE", type=str, default=None,
+                    help="run a JSON recipe headless (see ecco.rr.batch)")
 parser.add_argument("model", metavar="PATH", type=str, nargs="?", default=None,
                     help="model to load")
 args = parser.parse_args()
 
-if args.model :
+if args.batch :
+    from .rr.batch import main
+    main([args.batch])
+elif args.model :
     _module, model = load(args.model)
     _globals = globals()
     for _name in getattr(_module, "__extra__", []) :
@@ -1,10 +1,10 @@
-import time, datetime
+import time, datetime, sys
 import psutil
 import ipywidgets as ipw
 from IPython.display import display
 
 cdef class Logger (object) :
-    cdef public bint verbose
+    cdef public bint verbose, headless
     cdef public str head, tail, done_head, done_tail
     cdef unsigned int total, done, count, step, start
     cdef bint keep
@@ -17,7 +17,7 @@ cdef class Logger (object) :
                   total=0, steps=[], keep=False, verbose=None) :
         if verbose is not None :
             self.verbose = verbose
-        if not self.verbose :
+        if not self.verbose or self.headless :
             return self
         self.head = head
         self.tail = tail
@@ -72,14 +72,14 @@ cdef class Logger (object) :
         self.whead.value = self._fmt(self.head)
         self.wtail.value = self._fmt(self.tail)
     def __enter__ (self) :
-        if not self.verbose :
+        if not self.verbose or self.headless :
             return self
         self.start = int(time.time())
         self._update()
         display(self.hbox)
         return self
     def __exit__ (self, exc_type, exc_val, exc_tb) :
-        if not self.verbose :
+        if not self.verbose or self.headless :
             return
         if self.total and exc_type is not None :
             self.bar.bar_style = "danger"
@@ -92,11 +92,11 @@ cdef class Logger (object) :
         if not self.keep :
             self.hbox.close()
     cpdef void update (Logger self, unsigned int count=1) :
-        if not self.verbose :
+        if not self.verbose or self.headless :
             return
         self.update_to(self.done + self.count + count)
     cpdef void update_to (Logger self, unsigned int done) :
-        if not self.verbose :
+        if not self.verbose or self.headless :
             return
         if self.done > done :
             # go backward
@@ -119,7 +119,10 @@ cdef class Logger (object) :
                            "[warning]" : {"color" : "#BF7C00"},
                            "[error]" : {"color" : "#008800"}}
         cdef dict default = {"color" : "#000088"}
-        if level :
+        if self.headless :
+            # no notebook to display widgets, messages go to stderr
+            sys.stderr.write(f"{level} {message}\n" if level else f"{message}\n")
+        elif level :
             display(ipw.HTML('<p style="line-height:140%">'
                              '<span style="color:{color}; font-weight:bold;">'
                              '{level}</span> {message}'
@@ -1,4 +1,5 @@
 import itertools, re, tempfile, functools, subprocess, warnings, sys, operator
+import random, weakref
 import prince, its, ddd, sympy
 import pandas as pd
 import numpy as np
@@ -15,8 +16,8 @@ from ..graphs import Palette
 from ..cygraphs import Graph
 from ..unf import Unfolding
 from ..ui import log, getopt, HTML
-from .lts import LTS, Component, setrel
-from . import ltsprop
+from .lts import LTS, Component, Partition, setrel, pack, unpack, interning_stats
+from . import ltsprop, pool, archive
 from .st import sign2char as s2c, Parser, FailedParse, State
 from .. import pn
 
@@ -78,6 +79,19 @@ class hset (object) :
     def _ipython_display_ (self) :
         display(f"{self._sep} ".join(str(v) for v in self))
 
+def _hset_column (values, **k) :
+    # build a list of `hset` from a series of iterables, equal values share
+    # the same `hset` instance so that each is sorted only once
+    memo = {}
+    col = []
+    for v in values :
+        v = frozenset(v)
+        h = memo.get(v)
+        if h is None :
+            h = memo[v] = hset(v, **k)
+        col.append(h)
+    return col
+
 def parse (path, src=None) :
     try :
         return Parser(path, src).parse()
@@ -415,9 +429,148 @@ class Model (BaseModel) :
            corresponding sets of states is considered.
          - `split` (`True`): should the graph be initially split into its initial
            states, SCC hull, and deadlocks+basins
+         - `cluster` (`0`): if non-zero, partition the transition relation into
+           clusters of at most `cluster` rules grouped by overlapping variables
+           supports, so that least fixpoints saturate each cluster in turn
+           (see `ecco.rr.lts.LTS`)
+         - `processes` (`1`): number of worker processes used to check and
+           split components (all the CPUs if `None` or `0`), see attribute
+           `ComponentGraph.processes`
         Returns: newly created `ComponentGraph` instance
         """
         return ComponentGraph.from_model(self, *l, **k)
+    def lts_rules (self) :
+        """rules and constraints as expected by `ecco.rr.lts.LTS`
+
+        Return: a `dict` mapping each rule or constraint name to a pair of `dict`
+        `left, right` that map variables names to their Boolean values in the
+        left-hand side and right-hand side of the rule or constraint
+        """
+        return {r.name() : ({s.name : bool(s.sign) for s in r.left},
+                            {s.name : bool(s.sign) for s in r.right})
+                for r in self.spec}
+    def lts_init (self, init) :
+        """initial states as expected by `ecco.rr.lts.LTS`
+
+        Arguments:
+         - `init` (`str` or `list[str]`): initial states as accepted by `__call__`
+        Return: a `list` of `str` where each assignment sequence is made relative
+        to the initial state of the model
+        """
+        if isinstance(init, str) :
+            init = [init]
+        else :
+            init = list(init)
+        for i, s in enumerate(init) :
+            if s not in ("*", "+", "-") :
+                init[i] = ",".join(f"{s.state.name}{s2c[s.state.sign]}"
+                                   for s in self.spec.meta) + "," + s
+        return init
+    def scan (self, scenarios, compact=False, cluster=0, processes=None, limit=0) :
+        """what-if analysis over a batch of initial conditions
+
+        Each row of `scenarios` is an initial condition given as assignments of
+        variables, each column being a variable and each value being either
+        `"+"` (or `True`, or `1`), `"-"` (or `False`, or `0`), `"*"`, or empty
+        (`None`, `NaN`, or `""`) to keep the variable as in the model.
+        The transition relations are built once and shared by all the scenarios,
+        whose LTS are then computed in worker processes. Scenarios with the
+        same initial states are computed only once. Scenarios are grouped
+        with a scenario whose initial states include theirs (as seen from
+        the assignments), and their terminal SCCs are then taken among those
+        of this scenario instead of being searched again (unless `limit` is
+        set). Otherwise, the reachable states, deadlocks and hull of each
+        scenario are computed from scratch, and terminal SCCs are counted
+        but not returned.
+
+        Arguments:
+         - `scenarios` (`pandas.DataFrame`): the initial conditions, one per row
+        Options:
+         - `compact` (`False`): whether transient states should be removed
+         - `cluster` (`0`): size of the transition relation clusters
+         - `processes` (`None`): number of worker processes, all the CPUs are
+           used if `None`, and everything is computed in the current process
+           if `1`
+         - `limit` (`0`): if non-zero, the maximal number of attractors to be
+           searched for in each scenario
+        Return: a `pandas.DataFrame` with the same index as `scenarios` and
+        columns `init` (the initial assignments), `states` (number of reachable
+        states), `dead` (number of deadlocks), `hull` (number of states in the
+        SCC hull), `attractors` (number of terminal SCCs that are not deadlocks),
+        and `transient` (number of transient states) if `compact=True`
+        """
+        if compact and not self.spec.constraints :
+            log.warn("model has no constraints, setting <code>compact=False</code>")
+            compact = False
+        inits = [self._scan_init(row) for _, row in scenarios.iterrows()]
+        if not inits :
+            raise ValueError("no scenario to be scanned")
+        starts = {} # initial states => first scenario number
+        for num, i in enumerate(inits) :
+            starts.setdefault(tuple(self.lts_init(i)), num)
+        # group scenarios with a first one whose initial states include theirs
+        boxes = {start : self._scan_box(start) for start in starts}
+        groups = {} # first start => list of starts
+        for start in sorted(starts, key=lambda s : -np.prod([len(v) for v
+                                                             in boxes[s].values()])) :
+            for first in groups :
+                if all(b <= boxes[first][v] for v, b in boxes[start].items()) :
+                    groups[first].append(start)
+                    break
+            else :
+                groups[start] = [start]
+        found = {}
+        with log(head="<b>scanning</b>",
+                 tail="{done}/{total} groups of scenarios ({time}, ETA: {eta})",
+                 done_head="<b>scanned:</b>",
+                 done_tail="{total} groups of scenarios ({time})",
+                 total=len(groups)) :
+            first = next(iter(groups))
+            lts = LTS(self.gal(showlog=False), list(first), compact,
+                      self.lts_rules(), cluster)
+            jobs = [([(inits[starts[s]], list(s)) for s in group], limit, not n)
+                    for n, group in enumerate(groups.values())]
+            for group, rows in zip(groups.values(),
+                                   pool.imap(_scan_group, lts, jobs, processes)) :
+                for start, row in zip(group, rows) :
+                    found[starts[start]] = row
+                log.update()
+        rows = []
+        for i in inits :
+            row = dict(found[starts[tuple(self.lts_init(i))]])
+            row["init"] = i
+            rows.append(row)
+        table = pd.DataFrame.from_records(rows, index=scenarios.index)
+        if not compact :
+            del table["transient"]
+        return table
+    def _scan_box (self, start) :
+        # the values allowed for each variable by initial assignments `start`
+        # as returned by `lts_init`
+        values = {"+" : frozenset({1}), "-" : frozenset({0}), "*" : frozenset({0, 1})}
+        box = {}
+        for s in ",".join(start).split(",") :
+            if s in values :
+                box = {v : values[s] for v in box}
+            elif s :
+                box[s[:-1]] = values[s[-1]]
+        return box
+    def _scan_init (self, row) :
+        # convert a row of a scenarios table into an initial state assignment
+        names = {s.state.name for s in self.spec.meta}
+        assign = []
+        for var, val in row.items() :
+            if var not in names :
+                raise ValueError(f"unknown variable {var!r}")
+            elif val is None or val == "" or (isinstance(val, float) and np.isnan(val)) :
+                continue
+            elif val in ("+", "-", "*") :
+                assign.append(f"{var}{val}")
+            elif val in (True, False) :
+                assign.append(f"{var}{s2c[bool(val)]}")
+            else :
+                raise ValueError(f"invalid value {val!r} for variable {var!r}")
+        return ",".join(assign)
     def gal_path (self, compact=False, permissive=False) :
         return str(self[("c" if compact else "")
                         + ("p" if permissive else "")
@@ -991,6 +1144,40 @@ class Model (BaseModel) :
         with open(mci_path, "rb") as stream :
             return Unfolding.from_mci(stream)
 
+def _scan_lts (lts, init, attractors) :
+    # summary of one scenario LTS, see Model.scan
+    return {"init" : init,
+            "states" : len(lts.states),
+            "dead" : len(lts.dead),
+            "hull" : len(lts.hull),
+            "attractors" : len(attractors),
+            "transient" : len(lts.transient)}
+
+def _scan_group (lts, jobs, limit, same) :
+    # compute the scenarios in `jobs` (pairs `init, start`) sharing the relations
+    # of `lts`, the first scenario includes the initial states of all the others,
+    # and is `lts` itself if `same` (called in worker processes, see Model.scan)
+    (init, start), *rest = jobs
+    root = lts if same else lts.reinit(start)
+    found = root.attractors(limit)
+    rows = [_scan_lts(root, init, found)]
+    for init, start in rest :
+        sub = lts.reinit(start)
+        if limit :
+            attractors = sub.attractors(limit)
+        else :
+            # the states reachable from sub are closed under successors in
+            # root, so its terminal SCCs are those of root that it reaches
+            attractors = [a for a in found if a & sub.states]
+        rows.append(_scan_lts(sub, init, attractors))
+    return rows
+
+def _map_compos (context, nums) :
+    # apply a function to components (called in worker processes, see
+    # ComponentGraph._map)
+    compos, fun = context
+    return pack([fun(compos[n]) for n in nums])
+
 class _GCS (set) :
     "a subclass of set that is tied to a component graph so it has __invert__"
     components = set()
@@ -1003,16 +1190,32 @@ class _GCS (set) :
     def __xor__ (self, other) :
         return self.__class__(super().__xor__(other))
 
+def _step (name, args, kwargs={}) :
+    # textual description of a call, recorded in the history of graphs
+    return "{}({})".format(name, ", ".join([repr(a) for a in args]
+                                          + [f"{k}={v!r}"
+                                             for k, v in kwargs.items()]))
+
 def _rulekey (r) :
     return (r[0], int(r[1:]))
 
+def _ruletext (lts, r) :
+    # what rule or constraint `r` does in `lts`, whatever its name
+    if r not in lts.rules :
+        return r
+    left, right = lts.rules[r]
+    return r[0], tuple(sorted(left.items())), tuple(sorted(right.items()))
+
 class NodesTableProxy (TableProxy) :
     def __init__ (self, compograph, table, name="nodes") :
         super().__init__(table)
         self._c = compograph
         self._n = name
     def __call__ (self, col, fun=None) :
-        if fun is None :
+        if fun is None and col in setrel.__members__ :
+            return self._c._GCS(self._c._props().rel(setrel[col])
+                                & set(self.table.index))
+        elif fun is None :
             series = self.table[col].astype(bool)
         else :
             series = self.table[col].apply(fun).astype(bool)
@@ -1023,8 +1226,175 @@ class NodesTableProxy (TableProxy) :
         else :
             raise AttributeError(f"table {self._n!r} has no column {name!r}")
 
+class _PropIndex (object) :
+    "index of split properties: prop => setrel => set of components numbers"
+    def __init__ (self, components=()) :
+        self._rel = defaultdict(dict) # prop => num => setrel
+        self._idx = defaultdict(lambda : {r : set() for r in setrel})
+        for c in components :
+            self.add(c)
+    def copy (self, rem=()) :
+        "copy the index, removing the components numbered in `rem`"
+        new = self.__class__()
+        for prop, rels in self._rel.items() :
+            for num, rel in rels.items() :
+                if num not in rem :
+                    new.set(prop, num, rel)
+        return new
+    def add (self, compo) :
+        "index all the split properties of `compo:Component`"
+        for prop, rel in compo.split_props.items() :
+            self.set(prop, compo.num, rel)
+    def set (self, prop, num, rel) :
+        "record that component `num` has relation `rel` with `prop`"
+        old = self._rel[prop].get(num)
+        if old is not None :
+            self._idx[prop][old].discard(num)
+        self._rel[prop][num] = rel
+        self._idx[prop][rel].add(num)
+    def forget (self, prop=None) :
+        "remove `prop` from the index, or all the properties if `None`"
+        if prop is None :
+            self._rel.clear()
+            self._idx.clear()
+        else :
+            self._rel.pop(prop, None)
+            self._idx.pop(prop, None)
+    def known (self, prop) :
+        "the components numbers for which `prop` has been checked"
+        return self._rel.get(prop, {}).keys()
+    def match (self, prop, rels) :
+        "the components numbers that have one of relations `rels` with `prop`"
+        idx = self._idx.get(prop)
+        if idx is None :
+            return set()
+        return set().union(*(idx[r] for r in rels))
+    def rel (self, rel) :
+        "the components numbers that have relation `rel` with some property"
+        return set().union(*(idx[rel] for idx in self._idx.values()))
+
+class _RandomizedPCA (object) :
+    "principal component analysis using a randomized SVD, for large matrices"
+    def __init__ (self, n_components=2, n_iter=3, random_state=42,
+                  rescale_with_mean=True, rescale_with_std=True) :
+        self.n_components = n_components
+        self.n_iter = n_iter
+        self.random_state = random_state
+        self.rescale_with_mean = rescale_with_mean
+        self.rescale_with_std = rescale_with_std
+    def fit (self, df) :
+        X = df.to_numpy(dtype=float)
+        self.mean_ = X.mean(axis=0) if self.rescale_with_mean else 0.0
+        if self.rescale_with_std :
+            std = X.std(axis=0)
+            self.std_ = np.where(std > 0, std, 1.0)
+        else :
+            self.std_ = 1.0
+        Z = (X - self.mean_) / self.std_
+        rng = np.random.RandomState(self.random_state)
+        size = min(self.n_components + 10, *Z.shape)
+        Q, _ = np.linalg.qr(Z @ rng.normal(size=(Z.shape[1], size)))
+        for _ in range(self.n_iter) :
+            Q, _ = np.linalg.qr(Z @ (Z.T @ Q))
+        _, _, vt = np.linalg.svd(Q.T @ Z, full_matrices=False)
+        self.axes_ = vt[:self.n_components]
+        return self
+    def transform (self, df) :
+        Z = (df.to_numpy(dtype=float) - self.mean_) / self.std_
+        return pd.DataFrame(Z @ self.axes_.T, index=df.index)
+
+class _StoredComponent (object) :
+    "information about a saved component, used until it is actually loaded"
+    def __init__ (self, dump, alias) :
+        self.num = dump["num"]
+        self.on = tuple(dump["on"])
+        self.off = tuple(dump["off"])
+        self.graph_props = dump["graph_props"]
+        self.split_props = {p : setrel(r) for p, r in dump["split_props"].items()}
+        self._size = dump["size"]
+        self._alias = alias
+    def __len__ (self) :
+        return self._size
+    def props_row (self, alias=True) :
+        props = [set() for r in setrel]
+        for p, r in self.split_props.items() :
+            if alias :
+                props[r].add(self._alias.get(p, p))
+            else :
+                props[r].add(p)
+        return tuple(map(frozenset, props))
+
+class _Loader (object) :
+    "load the LTS and components of a saved component graph when first needed"
+    def __init__ (self, path, dump_lts, dump_compos) :
+        self.path = path
+        self.dump_lts = dump_lts
+        self.dump_compos = dump_compos
+        self.stored = {d["num"] : _StoredComponent(d, dump_lts["alias"])
+                       for d in dump_compos}
+    def __call__ (self, cg) :
+        cg._loader = None
+        with archive.Reader(self.path) as inf :
+            ddds = inf.ddds("ddd")
+            if "gal" in inf :
+                self.dump_lts["path"] = archive.stored_file(inf.read("gal"), ".gal")
+        cg.lts, cg.components, renum = _restore(self.dump_lts, self.dump_compos,
+                                                ddds, cg.model)
+        cg._c.update((c.num, c) for c in cg.components)
+        if renum :
+            # the tables built from the saved numbers are outdated
+            if cg._known_edges is not None :
+                cg._known_edges = _renumber(cg._known_edges[0], renum), set()
+            cg._p = None
+            cg._g = {}
+            for name in ("g", "nodes", "edges", "n", "e", "_GCS") :
+                cg.__dict__.pop(f"_cached_{name}", None)
+
+def _restore (dump_lts, dump_compos, ddds, model) :
+    # rebuild the LTS and components from their dumps and the loaded DDD,
+    # components whose saved numbers are used by other components in the
+    # session are renumbered, which is returned as a `dict` old => new
+    if not dump_lts.get("rules") :
+        # saved by a previous version of ecco, take the rules from the model
+        dump_lts["rules"] = model.lts_rules()
+    for dump in (dump_lts, *dump_compos) :
+        for i, n in enumerate(dump["DDD"]) :
+            dump["DDD"][i] = ddds[n]
+    lts = LTS.load(dump_lts)
+    compos = tuple(Component.load(dump, lts) for dump in dump_compos)
+    renum = {dump["num"] : c.num for dump, c in zip(dump_compos, compos)
+             if dump["num"] != c.num}
+    return lts, compos, renum
+
+def _renumber (edges, renum) :
+    # edges as in `ComponentGraph._known_edges` with components renumbered
+    return {(renum.get(src, src), renum.get(dst, dst)) : rules
+            for (src, dst), rules in edges.items()}
+
 class ComponentGraph (object) :
-    def __init__ (self, model, compact=False, init="", lts=None, **k) :
+    # set when the graph is lazily loaded, see `load`
+    _loader = None
+    # edges known without computing them, as a pair `edges, fresh` where
+    # `edges` maps pairs of components numbers to sets of rules, and `fresh`
+    # is the set of components whose edges remain to be computed, eg, when
+    # loaded from a file, or inherited from the graph a copy was derived from
+    _known_edges = None
+    # number of processes used to compute on components (see `_map`), set
+    # by option `processes` of `from_model`, may be changed on any graph and
+    # is inherited by the graphs derived from it
+    processes = 1
+    # a weak reference to the graph this one was derived from, the step that
+    # derived it, all the steps from the initial graph (including those that
+    # changed graphs in place), and the number of graphs derived since the
+    # initial graph
+    _parent = None
+    step = ""
+    _history = ()
+    _depth = 0
+    # whether the LTS and components are shared with other graphs, see `_own`
+    _lts_shared = False
+    def __init__ (self, model, compact=False, init="", lts=None, cluster=0,
+                  loader=None, **k) :
         """create a new instance
 
         This method is not intended to be used directly, but it will be called by
@@ -1035,16 +1405,74 @@ class ComponentGraph (object) :
         if compact and not self.model.spec.constraints :
             log.warn("model has no constraints, setting <code>compact=False</code>")
             compact = False
-        if lts is None :
-            self.lts = LTS(self.model.gal(), init, compact)
+        if loader is not None :
+            self._loader = loader
+        elif lts is None :
+            self.lts = LTS(self.model.gal(), init, compact,
+                           self.model.lts_rules(), cluster)
         else :
             self.lts = lts
         self.components = ()
         self.compact = compact
         self._c = {} # Component.num => Component
         self._g = {} # Component.num => Vertex
+        self._p = None # _PropIndex, built when first needed
+        self._fits = {} # PCA options => fitted PCA, components numbers
+        self._snapshots = {} # name => ComponentGraph, shared by derived graphs
+    @property
+    def lts (self) :
+        "the `LTS` from which the components are originated"
+        if self._loader is not None :
+            self._loader(self)
+        return self._lts
+    @lts.setter
+    def lts (self, lts) :
+        self._lts = lts
+    @property
+    def components (self) :
+        "the `tuple` of `Component` instances in the graph"
+        if self._loader is not None :
+            self._loader(self)
+        return self._components
+    @components.setter
+    def components (self, components) :
+        self._components = components
+    @property
+    def _c (self) :
+        if self._loader is not None :
+            self._loader(self)
+        return self._num2compo
+    @_c.setter
+    def _c (self, num2compo) :
+        self._num2compo = num2compo
+    def _nums (self) :
+        # components numbers, without loading them if the graph is lazily loaded
+        if self._loader is not None :
+            return list(self._loader.stored)
+        return [c.num for c in self.components]
+    def _props (self) :
+        # the index of split properties
+        if self._p is None and self._loader is not None :
+            self._p = _PropIndex(self._loader.stored.values())
+        elif self._p is None :
+            self._p = _PropIndex(self.components)
+        return self._p
+    def _index (self, compo, prop) :
+        # update the index of split properties after `prop` has been checked
+        # on `compo:Component` (that may belong to another graph)
+        if self._p is None :
+            return
+        nums = self._c if self._loader is None else self._loader.stored
+        if compo.num in nums :
+            self._p.set(prop, compo.num, compo.split_props[prop])
+    def _info (self, num) :
+        # a component, or its saved information if the graph is lazily loaded
+        if self._loader is not None :
+            return self._loader.stored[num]
+        return self._c[num]
     @classmethod
-    def from_model (cls, model, compact=False, init="", split=True) :
+    def from_model (cls, model, compact=False, init="", split=True, cluster=0,
+                    processes=1) :
         """create a `ComponentGraph` from a `Model` instance
 
         Arguments:
@@ -1066,14 +1494,16 @@ class ComponentGraph (object) :
            corresponding sets of states is considered.
          - `split` (`True`): should the graph be initially split into its initial
            states, SCC hull, and deadlocks+basins
+         - `cluster` (`int:0`): if non-zero, the maximal number of rules in each
+           cluster of the partitioned transition relation
+         - `processes` (`int:1`): number of worker processes used to check and
+           split components, all the CPUs are used if `None` or `0`. This is
+           stored in attribute `processes`, which may be changed at any time,
+           and is inherited by the derived graphs
         """
-        if isinstance(init, str) :
-            init = [init]
-        for i, s in enumerate(init) :
-            if s not in ("*", "+", "-") :
-                init[i] = ",".join(f"{s.state.name}{s2c[s.state.sign]}"
-                                   for s in model.spec.meta) + "," + s
-        cg = cls(compact=compact, init=init, model=model)
+        init = model.lts_init(init)
+        cg = cls(compact=compact, init=init, model=model, cluster=cluster)
+        cg.processes = processes
         c_all = Component(cg.lts, cg.lts.states,
                           gp=cg.lts.graph_props(cg.lts.states))
         if split :
@@ -1111,40 +1541,129 @@ class ComponentGraph (object) :
         exactly the same components.
         """
         return set(self.components) == set(other.components)
-    def _patch (self, rem, add) :
+    def _patch (self, rem, add, step="") :
         # return a copy of the ComponentGraph with `rem` nodes removed
-        # and `add` nodes added
-        lts = self.lts.copy()
-        cg = self.__class__(compact=self.compact, lts=lts, model=self.model)
+        # and `add` nodes added, the LTS and the kept components are shared
+        # with the copy until either graph modifies them, see `_own`. The
+        # tables that map components (`components`, `_c`, `_p`, and
+        # `_known_edges`) are copied, which takes a time linear in the size
+        # of the graph but no symbolic computation, so this is negligible
+        # wrt the steps that derive the graph
+        cg = self.__class__(compact=self.compact, lts=self.lts, model=self.model)
+        cg._lts_shared = self._lts_shared = True
         rnum = set(c.num for c in rem)
-        keep = tuple(c.copy(lts) for c in self.components if c.num not in rnum)
-        add = tuple(c.copy(lts) for c in add)
+        keep = tuple(c for c in self.components if c.num not in rnum)
+        add = tuple(add)
         cg.components = keep + add
         cg._c.update((c.num, c) for c in cg.components)
+        cg._parent = weakref.ref(self)
+        cg.step = step
+        cg._history = self._history + (step,)
+        cg._depth = self._depth + 1
+        cg._snapshots = self._snapshots
+        cg._fits = dict(self._fits)
+        cg._inherit_edges(self, rnum)
+        cg.processes = self.processes
+        if self._p is not None :
+            cg._p = self._p.copy(rnum)
+            for c in add :
+                cg._p.add(c)
         return cg
-    def _add_vertex (self, g, c) :
-        # add `c:Component` as a vertex in `g:igraph.Graph`
-        self._c[c.num] = c
-        self._g[c.num] = g.add_vertex(node=c.num).index
+    def _own (self, *compos) :
+        # make sure that the LTS and components `compos` can be modified without
+        # changing other graphs, and return the components that should be
+        # modified instead of `compos`. Components update the LTS they refer
+        # to, so when the shared LTS is copied, every component is rebound to
+        # the copy (components copies share their states and cached images)
+        if self._lts_shared :
+            self.lts = self.lts.copy()
+            self._lts_shared = False
+            self._c = {c.num : c.copy(self.lts) for c in self.components}
+            self.components = tuple(self._c[c.num] for c in self.components)
+        return [self._c[c.num] for c in compos]
+    def _map (self, fun, compos) :
+        # yield pairs `c, fun(c)` for the components in `compos`, computed in
+        # `self.processes` worker processes forked from the current one (see
+        # `pool.imap`), with `fun(c)` returning `None`, `ddd.sdd`, `Component`,
+        # or nested tuples of them, see `lts.pack`
+        compos = list(compos)
+        workers = min(pool.workers(self.processes), len(compos))
+        if workers <= 1 :
+            for c in compos :
+                yield c, fun(c)
+            return
+        size = max(1, len(compos) // (4 * workers))
+        chunks = [compos[i:i+size] for i in range(0, len(compos), size)]
+        context = ({c.num : c for c in compos}, fun)
+        jobs = [([c.num for c in chunk],) for chunk in chunks]
+        for chunk, packed in zip(chunks, pool.imap(_map_compos, context, jobs,
+                                                   workers)) :
+            yield from zip(chunk, unpack(self.lts, packed))
+    def _edges (self) :
+        # the edges known so far, see `_known_edges`
+        if hasattr(self, "_cached_g") :
+            # skip the dummy edge that `edges` may have added
+            return ({(e["src"], e["dst"]) : set(e["rules"]) for e in self.g.es
+                     if e["src"] != e["dst"] and e["rules"]},
+                    set())
+        return self._known_edges
+    def _inherit_edges (self, parent, rem) :
+        # inherit from `parent` the edges between the components that have not
+        # been removed, only the edges incident to the new components will be
+        # computed when `g` is built
+        known = parent._edges()
+        if known is None :
+            return
+        edges, fresh = known
+        keep = set(self._c)
+        self._known_edges = ({(s, d) : r for (s, d), r in edges.items()
+                              if s not in rem and d not in rem},
+                             (fresh & keep)
+                             | (keep - (set(parent._nums()) - rem)))
+    def _add_vertices (self, g, nums) :
+        # add components numbered `nums` as vertices in `g:igraph.Graph`
+        start = g.vcount()
+        g.add_vertices(len(nums), attributes={"node" : list(nums)})
+        self._g.update((n, i) for i, n in enumerate(nums, start))
     def _collect_edges (self, src, targets, edges) :
-        # collect the edges to be added from `src` to the nodes in `targets`
-        for trans, succ in src.succ(*targets) :
+        # collect the edges to be added from `src` to the nodes in
+        # `targets:Partition`
+        for trans, succ in src.edges(targets) :
             edges[src.num,succ.num].add(trans)
     def _add_edges (self, g, edges) :
         # add the collected `edges` to `g:igraph.Graph`
         _g = self._g
-        for (src, dst), rules in edges.items() :
-            g.add_edge(_g[src], _g[dst], src=src, dst=dst,
-                       rules=hset(rules, key=_rulekey))
+        pairs = list(edges)
+        g.add_edges([(_g[src], _g[dst]) for src, dst in pairs],
+                    attributes={"src" : [src for src, _ in pairs],
+                                "dst" : [dst for _, dst in pairs],
+                                "rules" : _hset_column(edges.values(),
+                                                       key=_rulekey)})
     @cached_property
     def g (self) :
         """the actual component graph stored as an `igraph.Graph` instance
         """
         g = ig.Graph(directed=True)
         edges = defaultdict(set)
-        for c in self.components :
-            self._add_vertex(g, c)
-            self._collect_edges(c, self.components, edges)
+        self._add_vertices(g, self._nums())
+        if self._known_edges is None :
+            part = Partition(self.components)
+            for c in self.components :
+                self._collect_edges(c, part, edges)
+        else :
+            known, fresh = self._known_edges
+            for key, rules in known.items() :
+                edges[key].update(rules)
+            if fresh :
+                # edges from fresh components to all the others, and from the
+                # other components to fresh ones
+                part = Partition(self.components)
+                targets = Partition(self._c[num] for num in fresh)
+                for c in self.components :
+                    if c.num in fresh :
+                        self._collect_edges(c, part, edges)
+                    else :
+                        self._collect_edges(c, targets, edges)
         self._add_edges(g, edges)
         return g
     @cached_property
@@ -1161,16 +1680,17 @@ class ComponentGraph (object) :
     def nodes (self) :
         """a `pandas.DataFrame` holding the information about the nodes
         """
-        nodes = self.g.get_vertex_dataframe()
-        def n_col (row) :
-            c = self._c[row.node]
-            return [len(c),
-                    hset(c.on),
-                    hset(c.off),
-                    hset(str(p) for p, v in c.graph_props.items() if v)]
-        nodes[["size", "on", "off", "topo"]] = nodes.apply(n_col, axis=1,
-                                                           result_type='expand')
-        nodes.set_index("node", inplace=True)
+        infos = [self._info(n) for n in self.g.vs["node"]]
+        if self._loader is None :
+            # compute on/off for all the components at once
+            self.lts.count_matrix(infos)
+        nodes = pd.DataFrame({"size" : np.array([len(c) for c in infos]),
+                              "on" : _hset_column(c.on for c in infos),
+                              "off" : _hset_column(c.off for c in infos),
+                              "topo" : _hset_column((str(p) for p, v
+                                                     in c.graph_props.items()
+                                                     if v) for c in infos)},
+                             index=pd.Index([c.num for c in infos], name="node"))
         self._update(nodes)
         return nodes
     @cached_property
@@ -1179,7 +1699,7 @@ class ComponentGraph (object) :
         """
         if len(self.g.es) == 0 :
             # if there is no edge, add a dummy one to build a correct dataframe
-            num = self.components[0].num
+            num = self._nums()[0]
             self.g.add_edge(self._g[num], self._g[num],
                             src=num, dst=num, rules=hset())
         else :
@@ -1188,35 +1708,151 @@ class ComponentGraph (object) :
         del edges["source"], edges["target"]
         if self.model.spec.labels :
             spec_labels = self.model.spec.labels
+            memo = {}
             def lbl (rules) :
-                labels = set()
-                for r in rules :
-                    labels.update(l.strip()
-                                  for l in (spec_labels.get(r) or "").split(",")
-                                  if l.strip())
-                return hset(labels)
-            edges["labels"] = edges["rules"].apply(lbl)
+                if rules not in memo :
+                    labels = set()
+                    for r in rules :
+                        labels.update(l.strip()
+                                      for l in (spec_labels.get(r) or "").split(",")
+                                      if l.strip())
+                    memo[rules] = hset(labels)
+                return memo[rules]
+            edges["labels"] = [lbl(r) for r in edges["rules"]]
         if num is not None :
             # remove the dummy edge
             return edges.drop((num, num), axis="index")
         else :
             return edges
+    def weigh (self) :
+        """count the transitions carried by the edges
+
+        For each edge `src -> dst` and each rule `r` labelling it, the number
+        of states in `src` that have a successor in `dst` through `r` is computed
+        symbolically (one preimage per rule for each destination component).
+        Two columns are added to table `edges`: `weights` that maps each rule to
+        its count, and `weight` that is the sum of these counts.
+        """
+        edges = self.edges
+        weights = []
+        for (src, dst), rules in edges["rules"].items() :
+            states = self._c[src].states
+            pre = self._c[dst].tpre()
+            weights.append({r : len(states & pre[r]) for r in rules})
+        edges["weights"] = weights
+        edges["weight"] = [sum(w.values()) for w in weights]
+    def rule_stats (self) :
+        """statistics about rules and constraints enablement
+
+        See `ecco.rr.lts.LTS.rule_stats`, the components of the graph are
+        used to count in how many components each rule is enabled.
+
+        Returns: a `pandas.DataFrame` indexed by rules and constraints names
+        """
+        return self.lts.rule_stats([c.states for c in self.components])
+    def interning_stats (self) :
+        """statistics about the numbering of components
+
+        See `ecco.rr.lts.interning_stats`, the numbering is shared by all the
+        components in the session, not only those in this graph.
+
+        Returns: a `dict` as returned by `ecco.rr.lts.interning_stats`
+        """
+        return interning_stats()
+    @property
+    def parent (self) :
+        """the graph this one was derived from
+
+        Only a weak reference is kept, so this is `None` for the initial graph
+        as well as when the parent graph is not referenced anymore.
+        """
+        if self._parent is not None :
+            return self._parent()
+    def history (self) :
+        """the steps that derived this graph from the one built from the model
+
+        The steps that change a graph in place (`check`, `check_many`,
+        `tag`, `forget`, and `forget_all`) are recorded as well, see `undo`.
+
+        Returns: a `list` of `str` describing each method call from the
+        initial graph to this one
+        """
+        return list(self._history)
+    def undo (self, steps=1) :
+        """the graph from which this one was derived
+
+        Graphs derived from one another share their LTS and the components
+        that are not changed. Graphs hold their parents through weak
+        references only, so that graphs that are not referenced anymore are
+        freed, use `snapshot` to keep a graph one may want to go back to.
+
+        Only the steps that derive a new graph are undone, the steps that
+        change a graph in place (`check`, `check_many`, `tag`, `forget`,
+        and `forget_all`) are recorded in the history but cannot be undone,
+        so the returned graph holds the properties checked on its components
+        since it was derived, including by the graphs derived from it that
+        share these components.
+
+        Arguments:
+         - `steps` (`int=1`): how many steps to go back in the history
+        Returns: a `ComponentGraph` instance
+        """
+        cg = self
+        for _ in range(steps) :
+            if not cg._depth :
+                raise ValueError("cannot undo further than the initial graph")
+            elif cg.parent is None :
+                raise ValueError("previous graph has been freed,"
+                                 " use snapshot to keep it")
+            cg = cg.parent
+        return cg
+    def branch (self) :
+        """a copy of the graph sharing all its content
+
+        This is useful to explore alternative analyses from the same graph,
+        that are thus recorded as separate branches in the history.
+
+        Returns: a new `ComponentGraph` instance
+        """
+        return self._patch([], [], "branch()")
+    def snapshot (self, name) :
+        """record this graph under `name`
+
+        Named snapshots are shared by all the graphs derived from the same
+        initial graph, see `snapshots` and `restore`.
+
+        Arguments:
+         - `name` (`str`): the name of the snapshot
+        """
+        self._snapshots[name] = self
+    @property
+    def snapshots (self) :
+        "a `dict` mapping names to the graphs recorded by `snapshot`"
+        return dict(self._snapshots)
+    def restore (self, name) :
+        """the graph recorded under `name` by `snapshot`
+
+        Arguments:
+         - `name` (`str`): the name of the snapshot
+        Returns: a `ComponentGraph` instance
+        """
+        try :
+            return self._snapshots[name]
+        except KeyError :
+            raise ValueError(f"no snapshot named {name!r}") from None
     def __len__ (self) :
         """number of components in the `ComponentGraph`
         """
-        return len(self.components)
+        return len(self._nums())
     def _update (self, nodes=None) :
         # updates the components' split_graph properties in a nodes dataframe
         if nodes is None :
             nodes = getattr(self, "_cached_nodes", None)
         if nodes is None :
             return
-        cols = [r.name for r in setrel]
-        data = pd.DataFrame.from_records([[hset(c, sep=";")
-                                           for c in self._c[n].props_row()]
-                                          for n in nodes.index],
-                                         columns=cols, index=nodes.index)
-        nodes[cols] = data
+        rows = [self._info(n).props_row() for n in nodes.index]
+        for r in setrel :
+            nodes[r.name] = _hset_column((row[r] for row in rows), sep=";")
     def update (self) :
         """updates table `nodes` wrt components' properties
 
@@ -1285,10 +1921,14 @@ class ComponentGraph (object) :
         alias = {a : p for p, a in self.lts.alias.items()}
         for prop in props :
             prop = alias.get(prop, prop)
-            for c in self.components :
+            for c in self._own(*(c for c in self.components
+                                 if prop in c.split_props)) :
                 c.split_props.pop(prop, None)
+            if self._p is not None :
+                self._p.forget(prop)
             self.lts.alias.pop(prop, None)
             self.lts.props.pop(prop, None)
+        self._history += (_step("forget", args),)
         self._update()
     def forget_all (self) :
         """forget about all properties
@@ -1296,10 +1936,13 @@ class ComponentGraph (object) :
         Remove all properties from the nodes table, from the components,
         and from the LTS.
         """
-        for c in self.components :
+        for c in self._own(*(c for c in self.components if c.split_props)) :
             c.split_props.clear()
+        if self._p is not None :
+            self._p.forget()
         self.lts.props.clear()
         self.lts.alias.clear()
+        self._history += (_step("forget_all", ()),)
         self._update()
     def tag (self, *args) :
         """add a dummy properties to components
@@ -1313,10 +1956,13 @@ class ComponentGraph (object) :
            components in the graph are considered
         """
         props, compo = self._get_args(args, min_props=1)
+        compo = self._own(*compo)
         #TODO: log
         for p in props :
             for c in compo :
                 c.tag(p)
+                self._index(c, p)
+        self._history += (_step("tag", args),)
         self._update()
     def check (self, *args, **aliased) :
         """check properties on components
@@ -1331,16 +1977,34 @@ class ComponentGraph (object) :
         to the relations between each component and the states validation `prop`
         in the states of whole component graph
         """
+        return self._check(args, aliased, name="check")
+    def check_many (self, *args, **aliased) :
+        """check many properties against components at once
+
+        Like `check`, but the properties that do not depend on the states
+        they are checked against are evaluated only once on the whole LTS,
+        sharing their common subexpressions, and components are then
+        classified by intersecting their states with those of each property.
+        This is much faster to screen many properties.
+
+        Arguments: as for `check`
+        Returns: as `check`
+        """
+        return self._check(args, aliased, ltsprop.SharedProps(self.model, self.lts),
+                           "check_many")
+    def _check (self, args, aliased, shared=None, name="check") :
         props, compo = self._get_args(args, aliased, min_props=1)
+        compo = self._own(*compo)
         ret = {c.num : dict() for c in compo}
         #TODO: log
         for prop, alias in props.items() :
-            checker = ltsprop.AnyProp(self.model, self.lts, prop)
-            for c in compo :
-                ret[c.num][prop] = setrel(c.check(prop, checker(c.states), alias)).name
+            for c, states in self._evaluate(prop, compo, shared) :
+                ret[c.num][prop] = setrel(c.check(prop, states, alias)).name
+                self._index(c, prop)
             if not self.lts.props[prop] :
                 desc = self.lts.alias.get(prop, prop)
                 log.warn(f"property {desc!r} is empty")
+        self._history += (_step(name, args, aliased),)
         self._update()
         return ret
     def split (self, *args, **aliased) :
@@ -1358,10 +2022,22 @@ class ComponentGraph (object) :
 
         Returns: a new `ComponentGraph` instance
         """
+        return self._split_all(args, aliased, "split")
+    def split_many (self, *args, **aliased) :
+        """split components wrt many properties at once
+
+        Like `split`, but properties are evaluated as in `check_many`.
+
+        Arguments: as for `split`
+        Returns: a new `ComponentGraph` instance
+        """
+        return self._split_all(args, aliased, "split_many",
+                               ltsprop.SharedProps(self.model, self.lts))
+    def _split_all (self, args, aliased, name, shared=None) :
         props, compo = self._get_args(args, aliased, min_props=1)
-        rem, add, compo = set(), set(), set(compo)
+        rem, add, compo = set(), set(), set(self._own(*compo))
         for prop, alias in props.items() :
-            r, a = self._split(prop, compo, alias)
+            r, a = self._split(prop, compo, alias, shared)
             if not self.lts.props[prop] :
                 desc = self.lts.alias.get(prop, prop)
                 log.warn(f"property {desc!r} is empty")
@@ -1371,12 +2047,20 @@ class ComponentGraph (object) :
         self._update()
         add.difference_update(rem)
         rem.intersection_update(self.components)
-        return self._patch(rem, add)
-    def _split (self, prop, components, alias="") :
-        rem, add = [], []
+        return self._patch(rem, add, _step(name, args, aliased))
+    def _evaluate (self, prop, components, shared=None) :
+        # pairs (c, states) of prop evaluated on each of components, using
+        # shared:ltsprop.SharedProps when possible
+        states = None if shared is None else shared(prop)
+        if states is not None :
+            return ((c, states) for c in components)
         checker = ltsprop.AnyProp(self.model, self.lts, prop)
-        for c in components :
-            intr, diff = c.split(prop, checker(c.states), alias)
+        return self._map(lambda c : checker(c.states, c), components)
+    def _split (self, prop, components, alias="", shared=None) :
+        rem, add = [], []
+        for c, states in self._evaluate(prop, components, shared) :
+            intr, diff = c.split(prop, states, alias)
+            self._index(c, prop)
             #TODO: log
             if intr is not None and diff is not None :
                 rem.append(c)
@@ -1414,17 +2098,21 @@ class ComponentGraph (object) :
         rem, add = [], []
         _, compos = self._get_args(args, max_props=0)
         # TODO: log
-        for c in compos :
-            parts = c.topo_split(split_init=init,
-                                 split_entries=entries,
-                                 split_exits=exits,
-                                 split_hull=hull,
-                                 split_dead=dead)
+        def split (c) :
+            return c.topo_split(split_init=init,
+                                split_entries=entries,
+                                split_exits=exits,
+                                split_hull=hull,
+                                split_dead=dead)
+        for c, parts in self._map(split, compos) :
             keep = [p for p in parts if p is not None]
             if len(keep) > 1 :
                 rem.append(c)
                 add.extend(keep)
-        return self._patch(rem, add)
+        return self._patch(rem, add, _step("topo_split", args,
+                                           dict(init=init, entries=entries,
+                                                exits=exits, hull=hull,
+                                                dead=dead)))
     def split_basins (self, *args, merge=False) :
         """split some components into the basins to some other components
 
@@ -1443,11 +2131,16 @@ class ComponentGraph (object) :
         """
         _, split = self._get_args(args[:-1], min_compo=1, max_props=0)
         _, dest = self._get_args(args[-1], min_compo=1, max_props=0)
+        split = self._own(*split)
         old = set(split)
         for d in dest :
+            prop = f"basin({d.num})"
             basin = self.lts.pred_s(d.states)
-            split = [s for c in split for s in c.split(f"basin({d.num})", basin)
-                     if s is not None]
+            parts = []
+            for c in split :
+                parts.extend(s for s in c.split(prop, basin) if s is not None)
+                self._index(c, prop)
+            split = parts
         new = set(split)
         if merge :
             for c in split :
@@ -1459,7 +2152,8 @@ class ComponentGraph (object) :
                     new.remove(c)
                     new.add(c.merge(d))
                     old.add(d)
-        return self._patch(list(old - new), list(new - old))
+        return self._patch(list(old - new), list(new - old),
+                           _step("split_basins", args, dict(merge=merge)))
     _relmatch = {(setrel.HASNO, True) : {setrel.HASNO},
                  (setrel.HASNO, False) : {setrel.HASNO},
                  (setrel.HAS, True) : {setrel.HAS},
@@ -1490,14 +2184,14 @@ class ComponentGraph (object) :
          - `name=prop, ...` (`str`): named properties fot classification
         """
         new = self.split(*classes.values(), *components)
-        c2n = {v : k for k, v in classes.items()}
-        def cname (row) :
-            props = set()
-            for c in ("EQUALS", "ISIN") :
-                if c in row.index :
-                    props.update(c2n[prop] for prop in row[c] if prop in c2n)
-            return hset(props)
-        new.n[col] = cname
+        index = new._props()
+        names = defaultdict(set)
+        for name, prop in classes.items() :
+            for num in index.match(prop, (setrel.EQUALS, setrel.ISIN)) :
+                names[num].add(name)
+        cnames = dict(zip(names, _hset_column(names.values())))
+        empty = hset()
+        new.n[col] = lambda row : cnames.get(row.name, empty)
         if src_col :
             def sname (row) :
                 return new.nodes[col][row.name[0]]
@@ -1510,7 +2204,7 @@ class ComponentGraph (object) :
     @cached_property
     def _GCS (self) :
         class MyGCS (_GCS) :
-            components = {c.num for c in self.components}
+            components = set(self._nums())
         return MyGCS
     def __call__ (self, prop, rel=setrel.HAS, strict=False) :
         """compute the set of components that match `prop`
@@ -1530,15 +2224,10 @@ class ComponentGraph (object) :
            otherwise, `rel` is considered relaxed (eg, `HAS` can be realised by `ISIN`)
         Return: the set of component numbers that match the property
         """
-        update = False
-        for c in self.components :
-            if prop not in c.split_props :
-                update = True
-                self.check(prop, c.num)
-        if update :
-            self._update()
-        return self._GCS(c.num for c in self.components
-                         if c.split_props[prop] in self._relmatch[rel,strict])
+        missing = set(self._nums()) - set(self._props().known(prop))
+        if missing :
+            self.check(prop, *missing)
+        return self._GCS(self._props().match(prop, self._relmatch[rel,strict]))
     def has (self, prop) :
         return self(prop, setrel.HAS, False)
     def HAS (self, prop) :
@@ -1582,55 +2271,119 @@ class ComponentGraph (object) :
             rel = {rel}
         else :
             rel = set(rel)
+        nums = set(c.num for c in compos)
         if all :
-            found = set(c.num for c in compos)
+            found = set(nums)
         else :
             found = set()
-        update = False
+        index = self._props()
         for p, a in props.items() :
-            for c in compos :
-                if p not in c.split_props :
-                    update = True
-                    self.check(p, c.num, a)
-            match = {c.num for c in compos if c.split_props[p] in rel}
+            missing = nums - set(index.known(p))
+            if missing and a :
+                self.check(*missing, **{a : p})
+            elif missing :
+                self.check(p, *missing)
+            match = index.match(p, rel) & nums
             if all :
                 found.intersection_update(match)
             else :
                 found.update(match)
-        if update :
-            self._update()
         return found
+    def explicit_states (self, *args, limit=0, sample=False, seed=None) :
+        """enumerate the states of components into tables
+
+        Contrasting with `explicit`, no `Component` is created for the
+        states, instead, they are enumerated into a Boolean matrix and their
+        properties as well as the transitions between them are computed at
+        once for all the states.
+
+        Arguments:
+         - `number, ...`: a series of components number, if empty, all the
+           components in the graph are considered
+         - `limit` (`int=0`): maximum number of states to be enumerated, shared
+           among the components proportionally to their sizes, `0` for all
+         - `sample` (`bool=False`): if `True`, the states enumerated when there
+           are more than `limit` are drawn at random, otherwise, the first ones
+           are taken
+         - `seed` (`int=None`): seed for the random drawing of states
+        Returns: a pair of `pandas.DataFrame` `nodes, edges` where `nodes` is
+        indexed by the states numbers and has one column `component`, one
+        Boolean column for each variable, one Boolean column for each graph
+        property, and one categorical column (with `setrel` names as values)
+        for each split property checked on the components; and `edges` has
+        columns `src` and `dst` (states numbers) and `rule` (categorical)
+        """
+        _, compos = self._get_args(args, max_props=0)
+        lts = self.lts
+        total = sum(len(c) for c in compos)
+        rng = random.Random(seed) if sample else None
+        mats = []
+        for c in compos :
+            if limit and total > limit :
+                quota = max(1, round(limit * len(c) / total))
+            else :
+                quota = 0
+            mats.append(lts.matrix(c.states, quota, rng))
+        matrix = np.vstack(mats)
+        nodes = pd.DataFrame(matrix, columns=list(lts.vars))
+        nodes.index.name = "state"
+        nodes.insert(0, "component",
+                     np.repeat([c.num for c in compos], [len(m) for m in mats]))
+        src, dst, trans = lts.matrix_succ(matrix)
+        loops = np.zeros(len(matrix), dtype=bool)
+        loops[src[src == dst]] = True
+        for name, values in lts.matrix_graph_props(matrix, loops).items() :
+            nodes[name] = values
+        props = set()
+        for c in compos :
+            props.update(c.split_props)
+        rels = [r.name for r in setrel]
+        for prop in sorted(props) :
+            pstates = lts.props[prop]
+            found = lts.member(matrix, pstates)
+            if len(pstates) == 1 :
+                codes = np.where(found, int(setrel.EQUALS), int(setrel.HASNO))
+            else :
+                codes = np.where(found, int(setrel.ISIN), int(setrel.HASNO))
+            nodes[lts.alias.get(prop, prop)] = pd.Categorical.from_codes(codes,
+                                                                         rels)
+        edges = pd.DataFrame({"src" : src,
+                              "dst" : dst,
+                              "rule" : pd.Categorical(trans)})
+        return nodes, edges
     def explicit (self, *args, limit=256) :
         """splits components into its individual states
 
+        The states of each component are enumerated and their properties
+        computed at once, as in `explicit_states`, but a `Component` is then
+        created for each state.
+
         Arguments:
          - `number, ...`: a series of components number, if empty, all the
            components in the graph are considered
          - `limit` (`int=256`): maximum number of components in the split graph,
-           if it will have more that `limit` components, a confirmation is asked
-           to the user (`limit` may be set <= 0 to avoid this user-interaction)
-        Returns: a new `ComponentGraph` instance
+           if it would have more that `limit` components, nothing is done (`limit`
+           may be set <= 0 to allow any number of components)
+        Returns: a new `ComponentGraph` instance, or `None` if `limit` is exceeded
         """
         _, compos = self._get_args(args, max_props=0)
         if limit > 0 :
-            size = sum((len(c) for c in compos), 0) + len(self.components) - len(compos)
-            if size  > limit :
-                answer = input(f"This will create a graph with {size} nodes,"
-                               f" are you sure? [N/y] ")
-                if not answer.lower().startswith("y") :
-                    return
+            size = sum((len(c) for c in compos), 0) + len(self) - len(compos)
+            if size > limit :
+                log.warn(f"this would create a graph with {size} nodes,"
+                         f" use a larger <code>limit</code> to allow it")
+                return
         rem, add = [], []
         state2compo = {}
         if "component" in self.nodes.columns :
             state2compo.update((row.name, row.component)
                                for _, row in self.nodes.iterrows())
-        for c in compos :
-            new = tuple(c.explicit())
+        for c, new in self._map(lambda c : tuple(c.explicit()), compos) :
             state2compo.update((n.num, c.num) for n in new)
             if len(new) > 1 :
                 rem.append(c)
                 add.extend(new)
-        ret = self._patch(rem, add)
+        ret = self._patch(rem, add, _step("explicit", args))
         ret.n["component"] = lambda row: state2compo.get(row.name, row.name)
         return ret
     def merge (self, *args) :
@@ -1644,7 +2397,151 @@ class ComponentGraph (object) :
         _, compos = self._get_args(args, max_props=0, min_compo=2)
         rem.extend(compos)
         add.append(rem[0].merge(*rem[1:]))
-        return self._patch(rem, add)
+        return self._patch(rem, add, _step("merge", args))
+    def quotient (self, key="props", topo=False) :
+        """merge the components that have the same key
+
+        Contrasting with `merge`, the properties of the merged components are
+        derived from those of the components they are made of, instead of being
+        computed again on their states. Edges are also derived from the existing
+        edges. Graph properties are recomputed only if `topo=True`, otherwise,
+        only properties `has_...` are kept. A column `members` is added to
+        table `nodes` with the components merged into each node.
+
+        Arguments:
+         - `key` (`str="props"` or `callable`): how components are classified,
+           either `"props"` for the relations they have with the checked
+           properties, `"onoff"` for their always-on and always-off variables,
+           a column name of table `nodes`, or a function that is called on each
+           `Component` and returns a hashable key
+         - `topo` (`bool=False`): whether to compute the graph properties of
+           the merged components
+        Returns: a new `ComponentGraph` instance
+        """
+        if key == "props" :
+            keyfun = lambda c : c.props_row(alias=False)
+        elif key == "onoff" :
+            keyfun = lambda c : (frozenset(c.on), frozenset(c.off))
+        elif isinstance(key, str) :
+            col = self.nodes[key]
+            keyfun = lambda c : col[c.num]
+        else :
+            keyfun = key
+        classes = defaultdict(list)
+        for c in self.components :
+            classes[keyfun(c)].append(c)
+        rem, add, members, c2q = [], [], {}, {}
+        for compos in classes.values() :
+            if len(compos) == 1 :
+                c2q[compos[0].num] = compos[0].num
+                continue
+            merged = self._quotient(compos, topo)
+            rem.extend(compos)
+            add.append(merged)
+            members[merged.num] = hset(c.num for c in compos)
+            c2q.update((c.num, merged.num) for c in compos)
+        self.g # ensure that edges are known
+        edges = defaultdict(set)
+        for (src, dst), rules in self._edges()[0].items() :
+            if c2q[src] != c2q[dst] :
+                edges[c2q[src], c2q[dst]].update(rules)
+        new = self._patch(rem, add, _step("quotient", (key,), dict(topo=topo)))
+        new._known_edges = dict(edges), set()
+        new.n["members"] = lambda row : members.get(row.name, hset([row.name]))
+        return new
+    def _quotient (self, compos, topo) :
+        # merge components wrt quotient
+        lts = self.lts
+        states = functools.reduce(operator.or_, (c.states for c in compos))
+        if topo :
+            gp = lts.graph_props(states)
+        else :
+            gp = {p : any(c.graph_props.get(p, False) for c in compos)
+                  for p in compos[0].graph_props if p.startswith("has_")}
+        sp = {}
+        for prop in set().union(*(c.split_props for c in compos)) :
+            rels = {c.split_props.get(prop) for c in compos}
+            pstates = lts.props[prop]
+            if None in rels :
+                # not checked on every component
+                continue
+            elif rels == {setrel.HASNO} :
+                sp[prop] = setrel.HASNO
+            elif rels <= {setrel.ISIN, setrel.EQUALS} :
+                sp[prop] = (setrel.EQUALS if len(states) == len(pstates)
+                            else setrel.ISIN)
+            elif rels & {setrel.CONTAINS, setrel.EQUALS} or not (pstates - states) :
+                sp[prop] = setrel.CONTAINS
+            else :
+                sp[prop] = setrel.HAS
+        on = set.intersection(*(set(c.on) for c in compos))
+        off = set.intersection(*(set(c.off) for c in compos))
+        return Component.make(lts, states, gp, sp, on, off)
+    def diff (self, other) :
+        """compare this component graph with another one
+
+        Both graphs must be built from models with the same variables in the
+        same order, for instance the same model with distinct `init` or
+        `compact`, or with edited rules. Components are aligned by
+        intersecting their sets of states, which is performed symbolically so
+        that no state is ever enumerated. An edge `src -> dst` labelled by a
+        rule is matched if the other graph has an edge labelled by a rule with
+        the same left-hand and right-hand sides (whatever its name) between
+        components that respectively intersect `src` and `dst`.
+
+        Arguments:
+         - `other` (`ComponentGraph`): the graph to compare with
+        Returns: a pair of `pandas.DataFrame`
+         - nodes, with columns `left` and `right` holding the numbers of the
+           components in `self` and `other` (or `<NA>` for the states that
+           belong only to one graph), and `states` holding the number of
+           states in each intersection
+         - edges, with columns `graph` (`"left"` if the edge exists only in
+           `self`, `"right"` if only in `other`), `src`, `dst`, `rules`
+           holding the unmatched rules, and `count` their number
+        """
+        if self.lts.vars != other.lts.vars :
+            raise ValueError("cannot compare graphs whose variables are"
+                             " distinct or differently ordered")
+        nodes, overlap, rev = [], defaultdict(set), defaultdict(set)
+        part = Partition(other.components)
+        for left in self.components :
+            for right in part.hits(left.states) :
+                nodes.append((left.num, right.num,
+                              len(left.states & right.states)))
+                overlap[left.num].add(right.num)
+                rev[right.num].add(left.num)
+        for c in self.components :
+            only = c.states - other.lts.states
+            if only :
+                nodes.append((c.num, None, len(only)))
+        for c in other.components :
+            only = c.states - self.lts.states
+            if only :
+                nodes.append((None, c.num, len(only)))
+        nodes = pd.DataFrame.from_records(nodes,
+                                          columns=["left", "right", "states"])
+        nodes = nodes.astype({"left" : "Int64", "right" : "Int64"})
+        edges = []
+        for graph, cg, oth, align in (("left", self, other, overlap),
+                                      ("right", other, self, rev)) :
+            cg.g, oth.g # ensure that edges are known
+            out = defaultdict(list)
+            for (src, dst), rules in oth._edges()[0].items() :
+                out[src].append((dst, {_ruletext(oth.lts, r) for r in rules}))
+            for (src, dst), rules in cg._edges()[0].items() :
+                found = set()
+                for s in align[src] :
+                    for d, r in out[s] :
+                        if d in align[dst] :
+                            found.update(r)
+                lost = {r for r in rules if _ruletext(cg.lts, r) not in found}
+                if lost :
+                    edges.append((graph, src, dst, hset(lost, key=_rulekey),
+                                  len(lost)))
+        edges = pd.DataFrame.from_records(edges, columns=["graph", "src", "dst",
+                                                          "rules", "count"])
+        return nodes, edges
     def drop (self, *args) :
         """drop one or more components from the component graph
 
@@ -1657,7 +2554,7 @@ class ComponentGraph (object) :
         if len(compos) == len(self) :
             log.warn("cannot drop all the components")
             return
-        return self._patch(compos, [])
+        return self._patch(compos, [], _step("drop", args))
     def form (self, *args, variables=None, normalise=None, separate=False) :
         """describe components by Boolean formulas
 
@@ -1692,11 +2589,9 @@ class ComponentGraph (object) :
         Return: a `pandas.DataFrame` instance
         """
         _, compos = self._get_args(args, max_props=0)
-        counts = [c.count() for c in compos]
-        df = pd.DataFrame.from_records([[c.get(v, 0) for v in self.lts.vars]
-                                        for c in counts],
-                                       index=[c.num for c in compos],
-                                       columns=list(sorted(self.lts.vars)))
+        df = pd.DataFrame(self.lts.count_matrix(list(compos)),
+                          index=[c.num for c in compos],
+                          columns=list(self.lts.vars))[sorted(self.lts.vars)]
         if transpose :
             return df.transpose()
         else :
@@ -1704,35 +2599,65 @@ class ComponentGraph (object) :
     def pca (self, *args, transpose=False,
              n_components=2, n_iter=3, copy=True, check_input=True,
              engine="auto", random_state=42,
-             rescale_with_mean=True, rescale_with_std=True) :
+             rescale_with_mean=True, rescale_with_std=True, reuse=0.0) :
         """principal component analysis of the `count` matrix
 
         Arguments:
          - `number, ...` (`int`): a series of components number, if empty, all the
            components in the graph are considered
          - `transpose`: passed to method `count()`
+         - `reuse` (`float=0.0`): fraction of the components that may be new
+           for a PCA fitted previously to be reused, see below
 
         See https://github.com/MaxHalford/prince#principal-component-analysis-pca
         for documentation about the other arguments.
 
+        Additionally, `engine` may be `"randomized"` to use a randomized SVD
+        that is faster on large matrices, `engine="auto"` chooses it for
+        matrices with more than one million cells.
+
+        The fitted PCA is cached, and reused when the same components are
+        analysed again, including in the graphs derived from this one. With a
+        non-zero `reuse`, it is also reused as long as the fraction of the
+        components that were not analysed does not exceed `reuse`, so that only the
+        new components have to be projected, which is faster but then the axes
+        are those fitted on the previous components.
+
         Returns: a `pandas.DataFrame` as computed by Prince.
         """
-        count = self.count(*args, transpose=transpose)
-        count = count[count.sum(axis="columns") > 0]
+        full = self.count(*args, transpose=transpose)
+        count = full[full.sum(axis="columns") > 0]
+        key = (args, transpose, n_components, n_iter, engine, random_state,
+               rescale_with_mean, rescale_with_std)
+        fit, nums = self._fits.get(key, (None, set()))
+        if (fit is None or transpose
+            or nums != set(count.index)
+            and len(set(count.index) - nums) > reuse * len(count)) :
+            if engine == "randomized" or (engine == "auto" and count.size > 10**6) :
+                fit = _RandomizedPCA(n_components=n_components,
+                                     n_iter=n_iter,
+                                     random_state=random_state,
+                                     rescale_with_mean=rescale_with_mean,
+                                     rescale_with_std=rescale_with_std)
+            else :
+                fit = prince.PCA(n_components=n_components,
+                                 n_iter=n_iter,
+                                 copy=copy,
+                                 check_input=check_input,
+                                 engine=engine,
+                                 random_state=random_state,
+                                 rescale_with_mean=rescale_with_mean,
+                                 rescale_with_std=rescale_with_std)
+            with warnings.catch_warnings() :
+                warnings.simplefilter("ignore")
+                fit.fit(count)
+            if not transpose :
+                self._fits[key] = fit, set(count.index)
         with warnings.catch_warnings() :
             warnings.simplefilter("ignore")
-            pca = prince.PCA(n_components=n_components,
-                             n_iter=n_iter,
-                             copy=copy,
-                             check_input=check_input,
-                             engine=engine,
-                             random_state=random_state,
-                             rescale_with_mean=rescale_with_mean,
-                             rescale_with_std=rescale_with_std)
-            pca.fit(count)
-            trans = pca.transform(count)
-        for idx in set(count.index) - set(trans.index) :
-            trans.loc[idx] = [0, 0]
+            trans = fit.transform(count)
+        for idx in set(full.index) - set(trans.index) :
+            trans.loc[idx] = [0] * n_components
         return trans
     def draw (self, **opt) :
         """draw the component graph
@@ -1764,7 +2689,8 @@ class ComponentGraph (object) :
     def search (self, *args, prune=True, **aliased) :
         # split every component wrt every property
         props, compo = self._get_args(args, aliased, min_props=2)
-        rem, add, compo = set(), set(), set(compo)
+        names = list(props)
+        rem, add, compo = set(), set(), set(self._own(*compo))
         for prop, alias in props.items() :
             r, a = self._split(prop, compo, alias)
             rem.update(r)
@@ -1774,15 +2700,15 @@ class ComponentGraph (object) :
         add.difference_update(rem)
         rem.intersection_update(self.components)
         # build new component graph
-        new = self._patch(rem, add)
+        new = self._patch(rem, add, _step("search", args, aliased))
         new.g # ensure that new.g is built, so that new._g is usable
         steps = [[new._g[c.num] for c in new.components
                   if c.split_props[prop] in (setrel.EQUALS, setrel.ISIN)]
-                 for prop in (one, two, *more)]
+                 for prop in names]
         # get shortest path between steps
         parts = new._search(steps)
-        path = [one]
-        for p, s in zip(parts, (two, *more)) :
+        path = [names[0]]
+        for p, s in zip(parts, names[1:]) :
             path.extend([p, s])
         # remove unwanted nodes
         if prune :
@@ -1790,52 +2716,158 @@ class ComponentGraph (object) :
             for p in parts :
                 keep.update(p)
             return new._patch([c for c in new.components
-                               if c.num not in keep], []), path
+                               if c.num not in keep], [], "prune()"), path
         else :
             return new, path
         #TODO: add info in edge table
         #TODO: upgrade Graph to allow drawing this info
     def _search (self, steps) :
-        # search a shortest path going through each step
+        # search a shortest path going through each step in turn
         # returns a series of paths from one step to the next one
-        # if no path exists, the corresponding path in the returned series is empty
-        parts = []
-        found = [[[None, n]] for n in steps[0]]
-        for sources, targets in zip(steps, steps[1:]) :
-            extend = []
-            for path in self._shortest_paths(sources, targets) :
-                extend.extend(p + [path] for p in found if p[-1][-1] == path[0])
-            if extend :
-                found = extend
-            else :
+        # if no path reaches a step, the corresponding path in the returned
+        # series is empty and the search restarts from the whole next step
+        adj = self.g.get_adjlist()
+        return [self.g.vs[p]["node"] for p in self._search_parts(adj, steps)]
+    def _search_parts (self, adj, steps) :
+        # breadth-first search on the product of the graph `adj` with the
+        # steps: a vertex at stage `k` has been reached through steps `0..k`,
+        # and moving to a vertex of step `k+1` may also advance to stage
+        # `k+1`, so that every candidate vertex of every step is considered
+        last = len(steps) - 1
+        if last < 1 :
+            return []
+        marks = [set(s) for s in steps]
+        parent = {(s, 0) : None for s in steps[0]}
+        todo = list(parent)
+        best = todo[0] if todo else None
+        while todo and best[1] < last :
+            succ = []
+            for u, k in todo :
+                for v in adj[u] :
+                    for n in ((v, k+1), (v, k)) if v in marks[k+1] else ((v, k),) :
+                        if n not in parent :
+                            parent[n] = (u, k)
+                            succ.append(n)
+                            if n[1] > best[1] :
+                                best = n
+            todo = succ
+        if best is None :
+            return [[]] + self._search_parts(adj, steps[1:])
+        chain = [best]
+        while parent[chain[-1]] is not None :
+            chain.append(parent[chain[-1]])
+        chain.reverse()
+        parts, current = [], [chain[0][0]]
+        for (_, k), (v, n) in zip(chain, chain[1:]) :
+            current.append(v)
+            if n > k :
+                parts.append(current)
+                current = [v]
+        if best[1] < last :
+            parts.append([])
+            parts.extend(self._search_parts(adj, steps[best[1]+1:]))
+        return parts
+    def witness (self, *args, init=False, **aliased) :
+        """compute a shortest trajectory of states visiting properties in order
+
+        The search is symbolic and does not split components: layers of
+        states reachable in one more step (onion rings) are computed
+        forward, for each number of properties visited so far, until a state
+        that has visited all of them is reached. Then, a trajectory is
+        extracted backward through these layers.
+
+        Arguments:
+         - `prop, ...` (`str`): the properties to be visited in order
+         - `init` (`bool=False`): if `True`, the trajectory starts from an
+           initial state, otherwise it starts from a state in the first property
+        Returns: a `pandas.DataFrame` with one row for each state in the
+        trajectory, and columns `component` (the component number of the state),
+        `rule` (the rule or constraint leading to the state), `visited` (how
+        many properties have been visited so far), and one column for each
+        variable. If there is no such trajectory, `None` is returned
+        """
+        props, _ = self._get_args(args, aliased, min_props=1 if init else 2,
+                                  max_compo=0)
+        lts = self.lts
+        pstates = [ltsprop.AnyProp(self.model, lts, p)(lts.states) for p in props]
+        start = lts.init if init else lts.states
+        k = len(pstates)
+        def advance (states, stage, layer) :
+            # add `states` to `layer`, advancing through the visited properties
+            while stage < k and states :
+                inside = states & pstates[stage]
+                layer[stage] |= states - inside
+                states = inside
+                stage += 1
+            if states :
+                layer[stage] |= states
+        empty = ddd.sdd.empty()
+        layer = [empty] * (k + 1)
+        advance(start, 0, layer)
+        layers = [layer]
+        seen = list(layer)
+        while not layer[k] :
+            new = [empty] * (k + 1)
+            for stage, states in enumerate(layer) :
+                if states :
+                    advance(lts.succ(states), stage, new)
+            layer = [n - s for n, s in zip(new, seen)]
+            if not any(layer) :
+                return None
+            seen = [s | n for s, n in zip(seen, layer)]
+            layers.append(layer)
+        # extract the trajectory backward
+        state, stage = layer[k].pick(), k
+        trace = [(state, stage)]
+        for prev in reversed(layers[:-1]) :
+            pred = lts.pred(state)
+            for s in range(stage, -1, -1) :
+                if s < stage and state - pstates[s] :
+                    break
+                found = pred & prev[s]
                 if found :
-                    found.sort(key=lambda l: sum(len(p) for p in l))
-                    parts.extend(found[0])
-                else :
-                    parts.append([None])
-                found = [[[None, n]] for n in targets]
-        if extend :
-            extend.sort(key=lambda l: sum(len(p) for p in l))
-            parts.extend(extend[0])
-        del parts[0]
-        parts = [p if p[0] is not None else [] for p in parts]
-        return [self.g.vs[p]["node"] for p in parts]
-    def _shortest_paths (self, sources, targets) :
-        with warnings.catch_warnings() :
-            warnings.simplefilter("ignore")
-            for src in sources :
-                for path in self.g.get_shortest_paths(src, targets) :
-                    if len(path) > 1 :
-                        yield path
+                    state, stage = found.pick(), s
+                    break
+            trace.append((state, stage))
+        trace.reverse()
+        # describe the trajectory
+        part = Partition(self.components)
+        rows = []
+        for i, (state, stage) in enumerate(trace) :
+            rule = ""
+            if i :
+                for t, succ in lts.tsucc.items() :
+                    if succ(trace[i-1][0]) & state :
+                        rule = t
+                        break
+            rows.append({"component" : part.hits(state)[0].num,
+                         "rule" : rule,
+                         "visited" : stage})
+        table = pd.DataFrame(rows)
+        matrix = np.vstack([lts.matrix(state) for state, _ in trace])
+        return pd.concat([table, pd.DataFrame(matrix, columns=list(lts.vars))],
+                         axis=1)
     def dump (self) :
         # dump ComponentGraph info to dict, as for LTS and Component
         return {"DDD" : [],
-                "model" : self.model.path}
-    def save (self, path) :
+                "model" : str(self.model.path),
+                "compact" : self.compact}
+    def save (self, path, relations=False, codec="raw") :
         """save component graph to `path`
 
+        The file is a container (see `ecco.rr.archive`) with sections `graph`,
+        `lts`, and `components` holding the information about each object, and
+        a section `ddd` holding all their sets of states, that share their
+        nodes.
+
         Arguments:
          - `path` (`str`): file name to be saved to
+         - `relations` (`bool=False`): whether to also save the GAL model from
+           which the transition relations are built, so that the graph is
+           reloaded with the same relations even if the model has changed since
+         - `codec` (`str="raw"`): how the sections are compressed, either
+           `"raw"` (no compression, sections are then read directly from the
+           mapped file), `"zlib"`, or `"lzma"`
         """
         d2n = {}
         hdr = []
@@ -1844,26 +2876,73 @@ class ComponentGraph (object) :
             for i, d in enumerate(dump["DDD"]) :
                 dump["DDD"][i] = d2n.setdefault(d, len(d2n))
             hdr.append(dump)
-        ddd.ddd_save(path, *d2n, dumps=hdr, compact=self.compact)
+        dump_cg, dump_lts, *dump_compos = hdr
+        with archive.Writer(path, codec, kind="ComponentGraph") as out :
+            out.add_json("graph", dump_cg)
+            out.add_json("lts", dump_lts)
+            out.add_json("components", dump_compos)
+            if hasattr(self, "_cached_g") :
+                # edges are saved only if they have been computed already
+                out.add_json("edges", [[e["src"], e["dst"], list(e["rules"])]
+                                       for e in self.g.es
+                                       if e["src"] != e["dst"]])
+            out.add_ddds("ddd", list(d2n))
+            if relations :
+                with open(self.lts.path, "rb") as gal :
+                    out.add("gal", gal.read())
     @classmethod
-    def load (cls, path) :
+    def load (cls, path, lazy=False) :
         """reload a previously saved component graph from `path`
 
+        Files saved by previous versions of ecco are supported.
+
         Arguments:
          - `path` (`str`): file name to load from
+         - `lazy` (`bool=False`): if `True`, only the information about the
+           components is loaded, which is enough to build tables `nodes` and
+           `edges` (the latter if it was computed before saving the graph),
+           and to query the properties that were checked before saving the
+           graph (eg, `g(prop)` or `g.n(prop)`), then the LTS and the
+           components are actually loaded when they are first needed. This
+           is not supported for files saved by previous versions of ecco,
+           that are always fully loaded
         Returns: loaded `ComponentGraph` instance
         """
-        headers, ddds = ddd.ddd_load(path)
-        dump_cg, dump_lts, *dump_compos = headers["dumps"]
-        for dump in (dump_cg, dump_lts, *dump_compos) :
-            for i, n in enumerate(dump["DDD"]) :
-                dump["DDD"][i] = ddds[n]
-        lts = LTS.load(dump_lts)
-        compos = tuple(Component.load(dump, lts) for dump in dump_compos)
-        model = load_model(dump_cg["model"])
-        cg = cls(compact=headers["compact"], lts=lts, model=model)
+        edges = None
+        if archive.is_archive(path) :
+            with archive.Reader(path) as inf :
+                dump_cg = inf.json("graph")
+                dump_lts = inf.json("lts")
+                dump_compos = inf.json("components")
+                if "edges" in inf :
+                    edges = {(src, dst) : set(rules)
+                             for src, dst, rules in inf.json("edges")}
+                _, model = load_model(str(dump_cg["model"]))
+                if lazy :
+                    cg = cls(compact=dump_cg["compact"], model=model,
+                             loader=_Loader(path, dump_lts, dump_compos))
+                    if edges is not None :
+                        cg._known_edges = edges, set()
+                    return cg
+                ddds = inf.ddds("ddd")
+                if "gal" in inf :
+                    dump_lts["path"] = archive.stored_file(inf.read("gal"), ".gal")
+        else :
+            headers, ddds = ddd.ddd_load(path)
+            dump_cg, dump_lts, *dump_compos = headers["dumps"]
+            dump_cg["compact"] = headers["compact"]
+            _, model = load_model(str(dump_cg["model"]))
+        return cls._from_dumps(model, dump_cg, dump_lts, dump_compos, ddds, edges)
+    @classmethod
+    def _from_dumps (cls, model, dump_cg, dump_lts, dump_compos, ddds, edges=None) :
+        # rebuild a component graph from the dumps of the graph, its LTS and
+        # components, whose DDD are keys in `ddds`
+        lts, compos, renum = _restore(dump_lts, dump_compos, ddds, model)
+        cg = cls(compact=dump_cg["compact"], lts=lts, model=model)
         cg.components = compos
         cg._c.update((c.num, c) for c in compos)
+        if edges is not None :
+            cg._known_edges = _renumber(edges, renum), set()
         return cg
 
 __extra__ = ["Model", "parse", "Palette", "ComponentGraph", "setrel"]
@@ -0,0 +1,182 @@
+"""versioned container files for saved LTS and component graphs
+
+A container file is made of named sections followed by an index:
+
+ - `MAGIC` (8 bytes) and format version (`uint32`)
+ - sections data, one after the other, each starting at an offset aligned
+   on `ALIGN` bytes, and possibly compressed
+ - index, a JSON `dict` with the format version, user-level metadata, and
+   the position, size, codec and SHA1 hash of each section
+ - index position (`uint64`) and `MAGIC` again
+
+The file is memory-mapped when opened, so that opening only reads the
+index, and each section is read only when requested. Sections are stored
+uncompressed by default (codec `"raw"`) and are then returned as views on
+the mapped file without any copy, compression is opt-in. DDD can only be
+loaded from a file of their own, so DDD sections are extracted to a file
+named after their hash (see `stored_file`) that is reused as long as it
+exists, without reading the section again.
+"""
+
+import hashlib, json, lzma, mmap, os, pathlib, struct, tempfile, zlib
+
+import ddd
+
+MAGIC = b"ECCO\x00ARC"
+VERSION = 1
+ALIGN = mmap.ALLOCATIONGRANULARITY
+
+_head = struct.Struct("<8sI")
+_tail = struct.Struct("<Q8s")
+
+_codecs = {"raw" : (bytes, bytes),
+           "zlib" : (zlib.compress, zlib.decompress),
+           "lzma" : (lzma.compress, lzma.decompress)}
+
+def dumps_ddds (ddds) :
+    "serialize a `list` of `ddd.ddd` (sharing their nodes) to `bytes`"
+    with tempfile.TemporaryDirectory() as tmp :
+        path = os.path.join(tmp, "ddd")
+        ddd.ddd_save(path, *ddds)
+        with open(path, "rb") as inf :
+            return inf.read()
+
+def loads_ddds (data) :
+    "the `list` of `ddd.ddd` serialized in `data` by `dumps_ddds`"
+    with tempfile.TemporaryDirectory() as tmp :
+        path = os.path.join(tmp, "ddd")
+        with open(path, "wb") as out :
+            out.write(data)
+        return load_ddds(path)
+
+def load_ddds (path) :
+    "the `list` of `ddd.ddd` saved in file `path` by `dumps_ddds`"
+    _, ddds = ddd.ddd_load(path)
+    return ddds
+
+def is_archive (path) :
+    "check whether file `path` is a container file"
+    try :
+        with open(path, "rb") as inf :
+            return inf.read(len(MAGIC)) == MAGIC
+    except OSError :
+        return False
+
+class Writer (object) :
+    """write a container file
+
+    Use as a context manager, the index is written when exiting.
+    """
+    def __init__ (self, path, codec="raw", **meta) :
+        if codec not in _codecs :
+            raise ValueError(f"unknown codec {codec!r}")
+        self.path = path
+        self.codec = codec
+        self.meta = meta
+        self.sections = {}
+        self._out = open(path, "wb")
+        self._out.write(_head.pack(MAGIC, VERSION))
+    def __enter__ (self) :
+        return self
+    def __exit__ (self, exc_type, exc_val, exc_tb) :
+        self.close()
+    def add (self, name, data, codec=None) :
+        "add a section `name` holding `bytes` `data`"
+        if name in self.sections :
+            raise ValueError(f"duplicated section {name!r}")
+        codec = codec or self.codec
+        data = _codecs[codec][0](data)
+        pad = -self._out.tell() % ALIGN
+        self._out.write(bytes(pad))
+        self.sections[name] = {"offset" : self._out.tell(),
+                               "size" : len(data),
+                               "codec" : codec,
+                               "sha1" : hashlib.sha1(data).hexdigest()}
+        self._out.write(data)
+    def add_json (self, name, obj, codec=None) :
+        "add a section `name` holding a JSON-serializable `obj`"
+        self.add(name, json.dumps(obj).encode("utf-8"), codec)
+    def add_ddds (self, name, ddds, codec=None) :
+        "add a section `name` holding a `list` of `ddd.ddd` (sharing their nodes)"
+        self.add(name, dumps_ddds(ddds), codec)
+    def close (self) :
+        if self._out.closed :
+            return
+        pos = self._out.tell()
+        self._out.write(json.dumps({"version" : VERSION,
+                                    "meta" : self.meta,
+                                    "sections" : self.sections}).encode("utf-8"))
+        self._out.write(_tail.pack(pos, MAGIC))
+        self._out.close()
+
+class Reader (object) :
+    """read a container file
+
+    Attributes:
+     - `version`: format version of the file
+     - `meta`: user-level metadata
+     - `sections`: the index of the sections
+    """
+    def __init__ (self, path) :
+        self.path = path
+        with open(path, "rb") as inf :
+            self._map = mmap.mmap(inf.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = _head.unpack_from(self._map, 0)
+        pos, tail = _tail.unpack_from(self._map, len(self._map) - _tail.size)
+        if magic != MAGIC or tail != MAGIC :
+            raise ValueError(f"{path!r} is not a valid ecco file")
+        elif version > VERSION :
+            raise ValueError(f"{path!r} uses format version {version},"
+                             f" this ecco supports up to version {VERSION}")
+        index = json.loads(bytes(self._map[pos:len(self._map) - _tail.size]))
+        self.version = index["version"]
+        self.meta = index["meta"]
+        self.sections = index["sections"]
+    def __enter__ (self) :
+        return self
+    def __exit__ (self, exc_type, exc_val, exc_tb) :
+        self.close()
+    def __contains__ (self, name) :
+        return name in self.sections
+    def raw (self, name) :
+        "a `memoryview` on the stored (possibly compressed) data of section `name`"
+        sect = self.sections[name]
+        return memoryview(self._map)[sect["offset"]:sect["offset"]+sect["size"]]
+    def read (self, name) :
+        "the data of section `name`"
+        sect = self.sections[name]
+        if sect["codec"] == "raw" :
+            return self.raw(name)
+        return _codecs[sect["codec"]][1](self.raw(name))
+    def json (self, name) :
+        "the object stored in JSON section `name`"
+        return json.loads(bytes(self.read(name)))
+    def ddds (self, name) :
+        "the `list` of `ddd.ddd` stored in section `name`"
+        sect = self.sections[name]
+        if sect["codec"] == "raw" and "sha1" in sect :
+            # the file extracted for the section is reused if it exists
+            return load_ddds(stored_file(self.raw(name), digest=sect["sha1"]))
+        return loads_ddds(self.read(name))
+    def close (self) :
+        "close the file, views returned by `raw` must have been released"
+        self._map.close()
+
+def stored_file (data, suffix="", digest=None) :
+    """a path to a file holding `data`
+
+    Files are named after the hash of their content in a temporary directory,
+    so that the same content is stored only once. If the SHA1 hash `digest` of
+    `data` is given, `data` is read only if the file does not exist yet.
+    """
+    if digest is None :
+        data = bytes(data)
+        digest = hashlib.sha1(data).hexdigest()
+    path = pathlib.Path(tempfile.gettempdir()) / "ecco" / (digest + suffix)
+    if not path.exists() :
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as out :
+            out.write(data)
+        os.replace(tmp, path)
+    return str(path)
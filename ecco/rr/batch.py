@@ -0,0 +1,222 @@
+"""run component graphs analyses without a notebook
+
+A recipe is a JSON file describing the graphs to be computed:
+
+    {"model" : "termites.rr",
+     "store" : "termites.store",
+     "graphs" : {
+        "base" : {"build" : {"compact" : true, "split" : false}},
+        "hull" : {"from" : "base",
+                  "steps" : [["split", "hull"], ["topo_split"]],
+                  "save" : "hull.ecco"},
+        "basins" : {"from" : "base",
+                    "steps" : [["check", "DEAD"],
+                               ["split_basins", {"merge" : true}]],
+                    "nodes" : "basins.csv"}}}
+
+Each graph is either built from the model, with the options in `"build"`
+that are passed to `Model.__call__`, or derived from another graph `"from"`
+by a sequence of `"steps"`. Each step is a list made of the name of a
+`ComponentGraph` method followed by its arguments, the last of which may be
+a `dict` of keyword arguments. Optionally, a graph may be exported to an
+archive `"save"`, and its tables to CSV files `"nodes"` and `"edges"`.
+Relative paths are taken from the directory of the recipe.
+
+Every computed graph is saved in a `SessionStore` (`"store"`, or a
+temporary directory if not given) under a name that is the hash of the model
+file, the build options and all the steps that lead to the graph, so that
+running the recipe again reuses the graphs that are still up to date. The
+graphs whose parents are available are computed in parallel, in forked
+worker processes, and one JSON record is output for each timed operation.
+"""
+
+import argparse, hashlib, json, os, pathlib, sys, tempfile, time
+
+from . import pool, ComponentGraph
+from .store import SessionStore
+from .. import load as load_model
+from ..ui import log
+
+STEPS = {"check", "check_many", "split", "split_many", "topo_split",
+         "split_basins", "tag", "forget", "forget_all", "merge", "drop",
+         "quotient", "search", "update"}
+
+class Batch (object) :
+    """a recipe being run
+
+    Attributes:
+     - `recipe` (`dict`): the loaded recipe
+     - `store` (`SessionStore`): where computed graphs are cached
+     - `keys` (`dict`): graph name => name in the store
+    """
+    def __init__ (self, path, store=None) :
+        """load a recipe
+
+        Arguments:
+         - `path` (`str`): JSON file holding the recipe
+         - `store` (`str=None`): directory of the store, overriding that of
+           the recipe (this one is relative to the current directory)
+        """
+        self.path = pathlib.Path(path)
+        with open(path) as inf :
+            self.recipe = json.load(inf)
+        self.root = self.path.parent
+        self.model_path = self._path(self.recipe["model"])
+        self._tmp = None
+        if store is None and "store" in self.recipe :
+            store = self._path(self.recipe["store"])
+        elif store is None :
+            self._tmp = tempfile.TemporaryDirectory()
+            store = self._tmp.name
+        self.store = SessionStore(store)
+        self.graphs = self.recipe["graphs"]
+        for name, spec in self.graphs.items() :
+            if ("from" in spec) == ("build" in spec) :
+                raise ValueError(f"graph {name!r} should have"
+                                 f" either 'from' or 'build'")
+            elif spec.get("from", name) not in self.graphs :
+                raise ValueError(f"graph {name!r} derives from"
+                                 f" unknown graph {spec['from']!r}")
+            for step in spec.get("steps", []) :
+                if step[0] not in STEPS :
+                    raise ValueError(f"unsupported step {step[0]!r}"
+                                     f" in graph {name!r}")
+        self.keys = {}
+        digest = hashlib.sha1(pathlib.Path(self.model_path).read_bytes())
+        for name in self.graphs :
+            self._key(name, digest.hexdigest(), [])
+        self._built = {}
+        self.model = None
+    def _path (self, path) :
+        return str(self.root / path)
+    def _key (self, name, digest, stack) :
+        # name of graph `name` in the store, from its whole derivation
+        if name in self.keys :
+            return self.keys[name]
+        elif name in stack :
+            raise ValueError(f"graph {name!r} derives from itself")
+        spec = self.graphs[name]
+        if "from" in spec :
+            head = self._key(spec["from"], digest, stack + [name])
+        else :
+            head = [digest, spec["build"]]
+        data = json.dumps([head, spec.get("steps", [])], sort_keys=True)
+        self.keys[name] = hashlib.sha1(data.encode("utf-8")).hexdigest()
+        return self.keys[name]
+    def graph (self, name) :
+        """the `ComponentGraph` computed for `name`, loaded from the store if
+        it was computed in another process
+        """
+        if name not in self._built :
+            self._built[name] = self.store.load(self.keys[name])
+        return self._built[name]
+    def _levels (self) :
+        # groups of graphs that can be computed in parallel
+        done, todo = set(), set(self.graphs)
+        while todo :
+            level = sorted(n for n in todo
+                           if self.graphs[n].get("from", None) in done | {None})
+            yield level
+            done.update(level)
+            todo.difference_update(level)
+    def run (self, processes=None, out=sys.stdout) :
+        """compute all the graphs of the recipe
+
+        Arguments:
+         - `processes` (`int=None`): number of worker processes, see
+           `pool.imap`
+         - `out` (`file=sys.stdout`): where to write the timing records, one
+           JSON object per line with keys `"graph"`, `"step"`, `"time"`
+           (in seconds), `"cached"`, `"size"` (number of components), and
+           `"pid"`
+        """
+        start = time.perf_counter()
+        _, self.model = load_model(self.model_path)
+        for level in self._levels() :
+            for records in pool.imap(_run_graph, self, [(n,) for n in level],
+                                     processes) :
+                for rec in records :
+                    out.write(json.dumps(rec) + "\n")
+                out.flush()
+        out.write(json.dumps({"graph" : None,
+                              "step" : "total",
+                              "time" : time.perf_counter() - start,
+                              "cached" : False,
+                              "size" : None,
+                              "pid" : os.getpid()}) + "\n")
+        out.flush()
+
+def _run_graph (batch, name) :
+    # compute graph `name`, called in a worker process
+    spec = batch.graphs[name]
+    key = batch.keys[name]
+    records = []
+    def timed (step, fun, *args, cached=False) :
+        start = time.perf_counter()
+        ret = fun(*args)
+        records.append({"graph" : name,
+                        "step" : step,
+                        "time" : time.perf_counter() - start,
+                        "cached" : cached,
+                        "size" : len(ret) if isinstance(ret, ComponentGraph) else None,
+                        "pid" : os.getpid()})
+        return ret
+    if key in batch.store :
+        cg = timed("load", batch.graph, name, cached=True)
+    else :
+        if "from" in spec :
+            # branch so that sibling graphs do not see the in-place steps
+            cg = timed("from", lambda : batch.graph(spec["from"]).branch())
+        else :
+            cg = timed("build", lambda : batch.model(**spec["build"]))
+        for method, *args in spec.get("steps", []) :
+            kwargs = args.pop(-1) if args and isinstance(args[-1], dict) else {}
+            ret = timed(f"{method}({', '.join(map(repr, args))})",
+                        _step, cg, method, args, kwargs)
+            if ret is None :
+                raise ValueError(f"step {method!r} of graph {name!r}"
+                                 f" did not produce a graph")
+            cg = ret
+        timed("store", batch.store.save, cg, key)
+        batch._built[name] = cg
+    if "save" in spec :
+        timed("save", cg.save, batch._path(spec["save"]))
+    for table in ("nodes", "edges") :
+        if table in spec :
+            timed(table, lambda t : getattr(cg, t).to_csv(batch._path(spec[t])),
+                  table)
+    return records
+
+_INPLACE = {"check", "check_many", "tag", "forget", "forget_all", "update"}
+
+def _step (cg, method, args, kwargs) :
+    # perform one step and return the resulting graph
+    ret = getattr(cg, method)(*args, **kwargs)
+    if method in _INPLACE :
+        return cg
+    elif isinstance(ret, tuple) :
+        # search returns the graph and a path
+        return ret[0]
+    return ret
+
+def main (argv=None) :
+    parser = argparse.ArgumentParser(prog="python -m ecco.rr.batch")
+    parser.add_argument("-j", "--processes", type=int, default=None,
+                        help="number of worker processes (default: all CPUs)")
+    parser.add_argument("-s", "--store", type=str, default=None,
+                        help="store directory (default: as in the recipe)")
+    parser.add_argument("-o", "--output", type=str, default=None,
+                        help="file to write timings to (default: stdout)")
+    parser.add_argument("recipe", metavar="PATH", type=str,
+                        help="JSON recipe to be run")
+    args = parser.parse_args(argv)
+    log.headless = True
+    batch = Batch(args.recipe, args.store)
+    if args.output :
+        with open(args.output, "w") as out :
+            batch.run(args.processes, out)
+    else :
+        batch.run(args.processes)
+
+if __name__ == "__main__" :
+    main()
@@ -1,13 +1,17 @@
 # distutils: language = c++
 # distutils: include_dirs = ../pyddd ../libDDD ../libITS
 
-import inspect
+import psutil
 import sympy
+import numpy as np
+import pandas as pd
 
 from ddd cimport ddd, sdd, shom
 from its cimport model
 
-from ddd import ddd_save, ddd_load
+from ddd import ddd_load
+
+from . import archive
 
 cdef extern from "dddwrap.h" :
     ctypedef short val_t
@@ -19,6 +23,18 @@ cdef inline ddd s2d (sdd s) :
 cdef inline sdd d2s (ddd d) :
     return sdd.mkz(d)
 
+# graph properties computed by `LTS.graph_props`: each name is mapped to a pair
+# `kind, what` where `what` is the name of the set of states of the LTS that is
+# compared with the checked states, or `None` for topological properties
+GRAPH_PROPS = {"has_dead" : ("has", "dead"),
+               "has_init" : ("has", "init"),
+               "is_dead" : ("is", "dead"),
+               "is_hull" : ("is", None),
+               "is_init" : ("is", "init"),
+               "is_scc" : ("is", None),
+               "isin_dead" : ("isin", "dead"),
+               "isin_init" : ("isin", "init")}
+
 cdef class LTS (object) :
     """a Labelled Transition System
 
@@ -42,6 +58,13 @@ cdef class LTS (object) :
      - `tpred`: a `dict` mapping rules and constraints names to `ddd.shom`
        predecessor functions
      - `vars`: a truple of `str` representing the variables of the model
+     - `rules`: a `dict` mapping rules and constraints names to pairs of `dict`
+       `left, right` that map variables names to the Boolean values they are
+       tested against (`left`) or assigned to (`right`)
+     - `cluster`: the maximal number of rules grouped into one cluster of the
+       successor relation, or `0` for a monolithic successor relation
+     - `clusters`: a `tuple` of `tuple` of rules and constraints names, that
+       is, how the successor relation is partitioned
     """
     cdef readonly str path
     cdef readonly model gal
@@ -49,19 +72,41 @@ cdef class LTS (object) :
     cdef readonly shom succ, pred, succ_o, pred_o, succ_s, pred_s
     cdef readonly dict props, alias, tsucc, tpred
     cdef readonly tuple vars
+    cdef readonly dict rules
+    cdef readonly unsigned int cluster
+    cdef readonly tuple clusters
+    cdef list _csucc, _csucc0
+    cdef dict _tsucc0
     cdef dict _var2sdd
+    cdef dict _gpcache
     cdef readonly bint compact
     cdef readonly shom constraints
     cdef readonly sdd transient
-    cpdef void save_file (LTS self, str path) :
+    cpdef void save_file (LTS self, str path, bint relations=False, str codec="raw") :
         """save LTS to file `path`
 
+        The file is a container (see `ecco.rr.archive`) with a section `lts`
+        holding the LTS information, and a section `ddd` holding its sets of
+        states.
+
         Parameters:
          - `path` (`str`): path where to save the LTS
+         - `relations` (`bool=False`): whether to also save the GAL model from
+           which the transition relations are built, so that the LTS is reloaded
+           with the same relations even if the GAL file has changed since
+         - `codec` (`str="raw"`): how the sections are compressed, either
+           `"raw"` (no compression, sections are then read directly from the
+           mapped file), `"zlib"`, or `"lzma"`
         """
         cdef dict dump = self.dump()
         cdef list ddds = dump.pop("DDD")
-        ddd_save(path, *ddds, **dump)
+        dump["DDD"] = list(range(len(ddds)))
+        with archive.Writer(path, codec, kind="LTS") as out :
+            out.add_json("lts", dump)
+            out.add_ddds("ddd", ddds)
+            if relations :
+                with open(self.path, "rb") as gal :
+                    out.add("gal", gal.read())
     cpdef dict dump (LTS self) :
         cdef list ddds = [s2d(self.init), s2d(self.states),
                           s2d(self.dead), s2d(self.hull),
@@ -77,6 +122,8 @@ cdef class LTS (object) :
                 "alias" : self.alias,
                 "vars" : self.vars,
                 "compact" : self.compact,
+                "rules" : self.rules,
+                "cluster" : self.cluster,
                 "DDD" : ddds}
     @classmethod
     def load (cls, dict dump) :
@@ -87,12 +134,14 @@ cdef class LTS (object) :
         init, states, dead, hull, transient, *props = dump["DDD"]
         lts = LTS.__new__(LTS, dump["path"])
         lts.gal = model(lts.path, fmt="GAL")
-        lts.vars = dump["vars"]
+        lts.vars = tuple(dump["vars"])
         lts.compact = dump["compact"]
         lts.alias = dump["alias"]
+        lts.rules = dump.get("rules", {})
+        lts.cluster = dump.get("cluster", 0)
         lts.init = d2s(init)
         lts.states = d2s(states)
-        lts.dead = d2s(states)
+        lts.dead = d2s(dead)
         lts.hull = d2s(hull)
         lts.transient = d2s(transient)
         for p, d in zip(dump["props"], props) :
@@ -106,23 +155,37 @@ cdef class LTS (object) :
     def load_file (cls, str path) :
         """load a previously saved LTS
 
+        Files saved by previous versions of ecco are supported.
+
         Parameters:
          - `path` (`str`): path from which the LTS is loaded
         Returns: an instance of `LTS`
         """
         cdef dict dump
         cdef list ddds
-        dump, ddds = ddd_load(path)
-        dump["DDD"] = ddds
+        if not archive.is_archive(path) :
+            dump, ddds = ddd_load(path)
+            dump["DDD"] = ddds
+            return cls.load(dump)
+        with archive.Reader(path) as inf :
+            dump = inf.json("lts")
+            ddds = inf.ddds("ddd")
+            if "gal" in inf :
+                dump["path"] = archive.stored_file(inf.read("gal"), ".gal")
+        dump["DDD"] = [ddds[n] for n in dump["DDD"]]
         return cls.load(dump)
-    def __cinit__ (self, str path, object init="", bint compact=True) :
+    def __cinit__ (self, str path, object init="", bint compact=True,
+                   dict rules=None, unsigned int cluster=0) :
         self.path = path
         self.compact = compact
+        self.rules = dict(rules or {})
+        self.cluster = cluster
         self.props = {}
         self.alias = {}
         self.tsucc = {}
         self.tpred = {}
         self._var2sdd = {}
+        self._gpcache = {}
     cpdef LTS copy (LTS self) :
         cdef LTS lts = LTS.__new__(LTS, self.path)
         lts.gal = self.gal
@@ -141,7 +204,14 @@ cdef class LTS (object) :
         lts.tsucc = self.tsucc
         lts.tpred = self.tpred
         lts.vars = self.vars
+        lts.rules = self.rules
+        lts.cluster = self.cluster
+        lts.clusters = self.clusters
+        lts._csucc = self._csucc
+        lts._csucc0 = self._csucc0
+        lts._tsucc0 = self._tsucc0
         lts._var2sdd = self._var2sdd
+        lts._gpcache = self._gpcache
         lts.compact = self.compact
         lts.constraints = self.constraints
         lts.transient = self.transient
@@ -151,16 +221,52 @@ cdef class LTS (object) :
                 and self.init == other.init)
     def __hash__ (self) :
         return hash(("ecco.lts.lTS", self.path, self.init))
-    def __init__ (self, str path, object init="", bint compact=True) :
+    def __init__ (self, str path, object init="", bint compact=True,
+                  dict rules=None, unsigned int cluster=0) :
         """creates an LTS instance
 
         Parameters:
          - `path` (`str`): path of a GAL file from which the LTS has to be created
          - `init` (`str=""` or `list[str]`): initial set of states
+         - `compact` (`bool=True`): whether transient states should be removed
+         - `rules` (`dict=None`): rules and constraints as stored in attribute
+           `rules`, used to compute their variables support
+         - `cluster` (`int=0`): if non-zero, the successor relation is partitioned
+           into clusters of at most `cluster` rules that have overlapping
+           variables supports, reachability and least fixpoints (`succ_s`,
+           `pred_s`) saturate each cluster in turn, while greatest fixpoints
+           (`succ_o`, `pred_o`) are computed on the union of the clusters,
+           otherwise, the successor relation is monolithic
         """
         self.gal = model(path, fmt="GAL")
         self.vars = s2d(self.gal.initial()).vars()
         self._build_succ()
+        self._build_states(init)
+    cpdef LTS reinit (LTS self, object init) :
+        """build an LTS for the same model with other initial states
+
+        The transition relations built from the GAL model are shared with
+        `self`, only the sets of states and the relations restricted to them
+        are computed for the new LTS.
+
+        Parameters:
+         - `init` (`str` or `list[str]`): initial set of states, as in `LTS()`
+        Returns: a new instance of `LTS`
+        """
+        cdef LTS lts = LTS.__new__(LTS, self.path, init, self.compact,
+                                   self.rules, self.cluster)
+        lts.gal = self.gal
+        lts.vars = self.vars
+        lts._var2sdd = self._var2sdd
+        lts.constraints = self.constraints
+        lts.clusters = self.clusters
+        lts._tsucc0 = self._tsucc0
+        lts._csucc0 = self._csucc0
+        lts._reset_succ()
+        lts._build_states(init)
+        return lts
+    cdef void _build_states (LTS self, object init) except * :
+        # build the sets of states and restrict the relations accordingly
         if isinstance(init, str) :
             self._build_initial_states([init])
         else :
@@ -178,6 +284,7 @@ cdef class LTS (object) :
         # build the successor relations
         cdef dict d = self.gal.transitions()
         cdef list constraints = []
+        cdef tuple part
         cdef str t
         cdef shom h, c
         for t, h in d.items() :
@@ -188,15 +295,85 @@ cdef class LTS (object) :
             else :
                 self.tsucc[t] = h
         self.constraints = shom.union(*constraints)
+        self.clusters = self._build_clusters()
+        self._csucc = [shom.union(*(self.tsucc[t] for t in part))
+                       for part in self.clusters]
         if self.compact :
             c = self.constraints.lfp()
-            self.succ = c * shom.union(*self.tsucc.values())
+            self._csucc = [c * h for h in self._csucc]
             for t, h in self.tsucc.items() :
                 self.tsucc[t] = c * h
-        else :
-            self.succ = shom.union(*self.tsucc.values())
+        # keep the relations before they are restricted to the reachable states
+        self._tsucc0 = dict(self.tsucc)
+        self._csucc0 = list(self._csucc)
+        self._reset_succ()
+    cdef void _reset_succ (LTS self) :
+        # (re)build the successor relations from the unrestricted ones
+        self.tsucc = dict(self._tsucc0)
+        self._csucc = list(self._csucc0)
+        self.succ = shom.union(*self._csucc)
+        # a greatest fixpoint cannot be chained cluster by cluster: a state
+        # whose successors are all reached through another cluster would be
+        # removed, so succ_o iterates on the union of the clusters
         self.succ_o = self.succ.gfp()
-        self.succ_s = self.succ.lfp()
+        self.succ_s = self._saturate(self._csucc)
+    cdef shom _saturate (LTS self, list rels) :
+        # the least fixpoint of the union of `rels`, when there are several
+        # clusters, each is saturated in turn, starting from those that have
+        # the lowest variables supports, and the whole chain is iterated to
+        # a fixpoint
+        cdef shom chain, h
+        if len(rels) == 1 :
+            return rels[0].lfp()
+        chain = rels[-1].lfp()
+        for h in reversed(rels[:-1]) :
+            chain = h.lfp() * chain
+        return chain.lfp()
+    cdef tuple _build_clusters (LTS self) :
+        # group transitions into clusters of at most self.cluster transitions
+        # whose variables supports overlap: starting from one cluster for
+        # each transition, the two clusters whose supports have the largest
+        # Jaccard similarity are merged as long as they fit into a cluster,
+        # ties are broken by the distance of the supports wrt the variables
+        # order; transitions with unknown support (constraints) are grouped
+        # together since their support is taken as all the variables
+        cdef dict order = {v : i for i, v in enumerate(self.vars)}
+        cdef frozenset every = frozenset(range(len(order)))
+        cdef list parts = []
+        cdef list names = []
+        cdef list supp = []
+        cdef tuple best, score
+        cdef frozenset s
+        cdef str t, v
+        cdef int i, j
+        if not self.cluster or self.cluster >= len(self.tsucc) :
+            return (tuple(self.tsucc),)
+        for t in self.tsucc :
+            if t in self.rules :
+                s = frozenset(order[v] for v in
+                              tuple(self.rules[t][0]) + tuple(self.rules[t][1])
+                              if v in order)
+            else :
+                s = every
+            parts.append([t])
+            supp.append(s or every)
+        while True :
+            best = None
+            for i in range(len(parts)) :
+                for j in range(i + 1, len(parts)) :
+                    if len(parts[i]) + len(parts[j]) > self.cluster :
+                        continue
+                    score = (len(supp[i] & supp[j]) / len(supp[i] | supp[j]),
+                             -abs(min(supp[i]) - min(supp[j])))
+                    if best is None or score > best[0] :
+                        best = (score, i, j)
+            if best is None :
+                break
+            _, i, j = best
+            parts[i].extend(parts.pop(j))
+            supp[i] = supp[i] | supp.pop(j)
+        return tuple(tuple(parts[i]) for _, i in
+                     sorted((min(s), i) for i, s in enumerate(supp)))
     cdef void _build_initial_states (LTS self, list init) except * :
         cdef str s
         cdef shom t
@@ -265,14 +442,18 @@ cdef class LTS (object) :
         # build the set of reachable states
         cdef sdd reach
         cdef shom succ, pred_u
-        reach = self.init
-        self.states = sdd.empty()
-        succ = self.succ | shom.ident()
-        while True :
-            reach = succ(reach)
-            if reach == self.states :
-                break
-            self.states = reach
+        if len(self._csucc) > 1 :
+            # chained saturation of the clusters
+            self.states = self.succ_s(self.init)
+        else :
+            reach = self.init
+            self.states = sdd.empty()
+            succ = self.succ | shom.ident()
+            while True :
+                reach = succ(reach)
+                if reach == self.states :
+                    break
+                self.states = reach
         pred_u = self.constraints.invert(self.states)
         self.transient = pred_u(self.states)
     cdef void _build_compact (LTS self) :
@@ -282,16 +463,18 @@ cdef class LTS (object) :
         self.states -= self.transient
         self.init -= self.transient
         # WARNING: `succ - transient` won't work, only `succ & states` does
-        self.succ &= self.states
+        self._csucc = [h & self.states for h in self._csucc]
+        self.succ = shom.union(*self._csucc)
         for t, h in self.tsucc.items() :
             self.tsucc[t] = h & self.states
     cdef void _build_pred (LTS self) :
         # build the predecessor relations
         cdef str t
         cdef shom h
-        self.pred = self.succ.invert(self.states)
+        cdef list cpred = [h.invert(self.states) for h in self._csucc]
+        self.pred = shom.union(*cpred)
         self.pred_o = self.pred.gfp()
-        self.pred_s = self.pred.lfp()
+        self.pred_s = self._saturate(cpred)
         for t, h in self.tsucc.items() :
             self.tpred[t] = h.invert(self.states)
     cdef void _build_dead_states (LTS self) :
@@ -302,13 +485,76 @@ cdef class LTS (object) :
         # intersect with self.states to remove potential transient states
         self.hull = (self.pred_o(self.states) & self.succ_o(self.states)) & self.states
     cpdef dict graph_props (LTS self, sdd states) :
-        cdef dict cp = {}
-        for name, method in sorted(inspect.getmembers(self, callable)) :
-            if (name.startswith("is_")
-                or name.startswith("isin_")
-                or name.startswith("has_")) :
-                cp[name] = method(states)
-        return cp
+        """compute the graph properties of a set of states
+
+        Parameters:
+         - `states` (`ddd.sdd`): set of states to be checked
+        Returns: a `dict` that maps the names in `GRAPH_PROPS` to `bool`
+        """
+        return self.graph_props_many([states])[0]
+    cpdef list graph_props_many (LTS self, list parts, object names=None) :
+        """compute the graph properties of several sets of states
+
+        Properties that compare states with a set of the LTS are computed
+        directly. `is_hull` is decided without fixpoint for the states that
+        are not all in the hull of the LTS and for singletons, and `is_scc`
+        is computed only for hulls. Results are cached for each set of
+        states, so that the sets already checked are not checked again.
+
+        Parameters:
+         - `parts` (`list[ddd.sdd]`): sets of states to be checked
+         - `names` (`iterable=None`): properties to be computed, all those in
+           `GRAPH_PROPS` if `None`
+        Returns: a `list` of `dict` that map properties names to `bool`, one
+        for each set in `parts`
+        """
+        cdef list found = []
+        cdef dict known
+        cdef sdd states
+        cdef str name
+        if names is None :
+            names = GRAPH_PROPS
+        for states in parts :
+            known = self._gpcache.get(states)
+            if known is None :
+                if len(self._gpcache) >= 4096 :
+                    self._gpcache.clear()
+                known = self._gpcache[states] = {}
+            for name in names :
+                if name not in known :
+                    known[name] = self._graph_prop(name, states, known)
+            found.append({name : known[name] for name in names})
+        return found
+    cdef bint _graph_prop (LTS self, str name, sdd states, dict known) except * :
+        # compute one graph property, using those already `known` for states
+        cdef str kind
+        cdef object what
+        cdef sdd i, s
+        kind, what = GRAPH_PROPS[name]
+        if what is not None :
+            s = getattr(self, what)
+            if kind == "is" :
+                return states == s
+            elif kind == "isin" :
+                return states < s
+            else :
+                return bool(states & s)
+        elif name == "is_hull" :
+            i = states & self.states
+            if i - self.hull :
+                # every hull is included in the hull of the LTS
+                return False
+            elif len(i) == 1 :
+                return bool(self.succ(i) & i)
+            return (self.succ_o(i) & self.pred_o(i)) == i
+        elif name == "is_scc" :
+            if "is_hull" not in known :
+                known["is_hull"] = self._graph_prop("is_hull", states, known)
+            if not known["is_hull"] :
+                # every SCC is a hull
+                return False
+            return self.is_scc(states)
+        return getattr(self, name)(states)
     cpdef bint is_dead (LTS self, sdd states) :
         """check whether `states` is the set of all deadlocks
 
@@ -357,6 +603,32 @@ cdef class LTS (object) :
         Returns: `True` if `states` contains initial state, `False` otherwise
         """
         return bool(states & self.init)
+    cpdef list attractors (LTS self, unsigned long limit=0) :
+        """compute the terminal SCCs of the LTS that are not deadlocks
+
+        Parameters:
+         - `limit` (`int=0`): if non-zero, stop after `limit` SCCs have been found
+        Returns: a `list` of `ddd.sdd`, one for each terminal SCC
+        """
+        cdef list found = []
+        cdef sdd cand, prev, st, reach, scc
+        # candidates are hull states whose successors are all candidates
+        cand = self.hull
+        while True :
+            prev = cand
+            cand = cand - self.pred(self.states - cand)
+            if cand == prev :
+                break
+        while cand :
+            st = cand.pick()
+            reach = self.succ_s(st) & self.states
+            scc = reach & self.pred_s(st)
+            if reach == scc and len(scc) > 1 :
+                found.append(scc)
+                if limit and len(found) >= limit :
+                    break
+            cand -= scc
+        return found
     cpdef bint is_hull (LTS self, sdd states) :
         """check whether `states` is a SCC hull (not necessarily the largest one)
 
@@ -379,6 +651,349 @@ cdef class LTS (object) :
             return False
         s = i.pick()
         return (self.succ_s(s) & self.pred_s(s)) == i
+    cpdef object rule_stats (LTS self, parts=()) :
+        """statistics about rules and constraints enablement
+
+        A rule or constraint is enabled in a state if this state satisfies its
+        left-hand side (as given by attribute `rules`), and it is effective if it
+        can actually be fired from this state (as given by attribute `tpred`).
+        The numbers of states where each rule is enabled are computed all at
+        once in a single traversal of the DDD of states, memoized on the DDD
+        nodes. In a compact LTS, constraints are not transitions of the LTS
+        (they are applied within rules) and are thus not reported.
+
+        Parameters:
+         - `parts` (`list[ddd.sdd]=()`): sets of states (typically components)
+           for which to count where each rule is enabled, empty sets are
+           ignored
+        Returns: a `pandas.DataFrame` indexed by the rules and constraints names,
+        with columns `enabled` (number of states where it is enabled), `effective`
+        (number of states where it is effective), and, if `parts` is not empty,
+        `components` (number of `parts` where it is enabled)
+        """
+        cdef list names
+        cdef str t, v
+        cdef dict masks = {}
+        cdef dict memo = {}
+        cdef object ones, found
+        cdef sdd part
+        cdef int val
+        if not self.rules :
+            raise ValueError("rules and constraints are unknown to this LTS")
+        names = ([t for t in self.rules if t in self.tsucc]
+                 + [t for t in self.tsucc if t not in self.rules])
+        # counts may exceed 64 bits, so they are Python integers
+        ones = np.ones(len(names), dtype=object)
+        for v in self.vars :
+            for val in (0, 1) :
+                masks[v, val] = np.array([self.rules.get(t, ({}, {}))[0].get(v, val)
+                                          == val for t in names], dtype=bool)
+        stats = pd.DataFrame(index=names)
+        stats["enabled"] = self._enabled(s2d(self.states), memo, masks, ones)
+        stats["effective"] = [len(self.tpred[t](self.states)) for t in names]
+        if parts :
+            found = np.zeros(len(names), dtype=int)
+            for part in parts :
+                if part :
+                    found += self._enabled(s2d(part), memo, masks, ones) > 0
+            stats["components"] = found
+        return stats
+    cdef object _enabled (LTS self, ddd head, dict memo, dict masks, object ones) :
+        # vector of the numbers of states below head that satisfy each guard
+        cdef object ret, sub, mask
+        cdef str var
+        cdef val_t val
+        cdef ddd child
+        if head in memo :
+            return memo[head]
+        if head.stop() :
+            ret = ones
+        else :
+            ret = ones * 0
+            for var, num, val, child in head.edges() :
+                sub = self._enabled(child, memo, masks, ones)
+                mask = masks.get((var, val))
+                ret = ret + (sub if mask is None else np.where(mask, sub, 0))
+        memo[head] = ret
+        return ret
+    cpdef object matrix (LTS self, sdd states, unsigned long long limit=0,
+                         object rng=None) :
+        """enumerate states into a Boolean matrix
+
+        Row `i` is the `i`-th state in `states` and column `j` the value of
+        variable `self.vars[j]`. The matrix is built level by level of the
+        DDD of `states`, with one NumPy operation for each arc of the DDD.
+        If `limit` states are requested, they are obtained instead by
+        unranking the `limit` first states, or `limit` states drawn at
+        random using `rng`, one path in the DDD for each state.
+
+        Parameters:
+         - `states` (`ddd.sdd`): the states to be enumerated
+         - `limit` (`int=0`): maximal number of states, `0` for all
+         - `rng` (`random.Random=None`): if not `None`, how states are drawn
+           when there are more than `limit`
+        Returns: a `numpy.ndarray` of `bool`
+        """
+        cdef dict col = {v : i for i, v in enumerate(self.vars)}
+        cdef ddd head = s2d(states)
+        cdef ddd node, child
+        cdef dict groups, todo
+        cdef list done = []
+        cdef str var
+        cdef val_t val
+        cdef object size = len(head)
+        cdef object ranks, mat, sub
+        if limit and size > limit :
+            if rng is None :
+                ranks = range(limit)
+            else :
+                ranks = sorted(rng.sample(range(size), limit))
+            mat = np.zeros((limit, len(col)), dtype=bool)
+            for i, r in enumerate(ranks) :
+                self._unrank(head, r, mat[i], col)
+            return mat
+        groups = {head : [np.zeros((1, len(col)), dtype=bool)]}
+        while groups :
+            todo = {}
+            for node, mats in groups.items() :
+                mat = np.vstack(mats) if len(mats) > 1 else mats[0]
+                if node.stop() :
+                    done.append(mat)
+                    continue
+                for var, num, val, child in node.edges() :
+                    sub = mat.copy()
+                    sub[:,col[var]] = val
+                    todo.setdefault(child, []).append(sub)
+            groups = todo
+        if not done :
+            return np.zeros((0, len(col)), dtype=bool)
+        return np.vstack(done)
+    cdef void _unrank (LTS self, ddd node, object rank, object row, dict col) :
+        # fill row with the values of the state numbered rank below node
+        cdef str var
+        cdef val_t val
+        cdef ddd child
+        cdef object size
+        while not node.stop() :
+            for var, num, val, child in node.edges() :
+                size = len(child)
+                if rank < size :
+                    row[col[var]] = val
+                    node = child
+                    break
+                rank -= size
+    cpdef object member (LTS self, object matrix, sdd states) :
+        """test which rows of a matrix of states belong to a set of states
+
+        The rows are pushed down the DDD of `states` all together, with one
+        NumPy operation for each arc of the DDD that is actually reached.
+
+        Parameters:
+         - `matrix` (`numpy.ndarray`): states as returned by `matrix`
+         - `states` (`ddd.sdd`): the set of states to test membership in
+        Returns: a `numpy.ndarray` of `bool` with one item for each row
+        """
+        cdef dict col = {v : i for i, v in enumerate(self.vars)}
+        cdef object found = np.zeros(len(matrix), dtype=bool)
+        cdef dict groups, todo
+        cdef ddd node, child
+        cdef str var
+        cdef val_t val
+        cdef object idx, sel
+        groups = {s2d(states) : [np.arange(len(matrix))]}
+        while groups :
+            todo = {}
+            for node, rows in groups.items() :
+                idx = np.concatenate(rows) if len(rows) > 1 else rows[0]
+                if node.stop() :
+                    found[idx] = True
+                    continue
+                for var, num, val, child in node.edges() :
+                    sel = idx[matrix[idx,col[var]] == val]
+                    if len(sel) :
+                        todo.setdefault(child, []).append(sel)
+            groups = todo
+        return found
+    cpdef tuple matrix_succ (LTS self, object matrix) :
+        """compute the transitions between the rows of a matrix of states
+
+        Rules and constraints (as given by attribute `rules`) are applied on
+        all the rows at once. In a compact LTS, the constraints are then
+        applied until stable states are reached. Only the transitions whose
+        target is also a row of `matrix` are returned.
+
+        Parameters:
+         - `matrix` (`numpy.ndarray`): states as returned by `matrix`
+        Returns: a triple of `numpy.ndarray` `src, dst, trans` such that
+        `src[i]` and `dst[i]` are the rows numbers of the source and target
+        states of transition `trans[i]`
+        """
+        cdef dict col = {v : i for i, v in enumerate(self.vars)}
+        cdef dict index = {r.tobytes() : i
+                           for i, r in enumerate(np.packbits(matrix, axis=1))}
+        cdef list consts = [t for t in self.rules if t.startswith("C")]
+        cdef list src = [], dst = [], trans = []
+        cdef object cen, en, rows, parents, found
+        cdef str t
+        if not self.rules :
+            raise ValueError("rules and constraints are unknown to this LTS")
+        cen = np.zeros(len(matrix), dtype=bool)
+        for t in consts :
+            cen |= self._enabled_rows(matrix, t, col)
+        for t in self.rules :
+            if t not in self.tsucc :
+                continue
+            en = self._enabled_rows(matrix, t, col)
+            if not t.startswith("C") :
+                en &= ~cen
+            rows = self._fire_rows(matrix[en], t, col)
+            parents = np.flatnonzero(en)
+            if self.compact :
+                parents, rows = self._stabilise(parents, rows, consts, col)
+            found = np.array([index.get(r.tobytes(), -1)
+                              for r in np.packbits(rows, axis=1)], dtype=int)
+            src.append(parents[found >= 0])
+            dst.append(found[found >= 0])
+            trans.append(np.full((found >= 0).sum(), t, dtype=object))
+        if not src :
+            return (np.zeros(0, dtype=int), np.zeros(0, dtype=int),
+                    np.zeros(0, dtype=object))
+        return np.concatenate(src), np.concatenate(dst), np.concatenate(trans)
+    cdef object _enabled_rows (LTS self, object matrix, str t, dict col) :
+        # which rows of matrix enable rule or constraint t
+        cdef dict left, right
+        cdef str v
+        cdef object en = np.ones(len(matrix), dtype=bool)
+        cdef object loop = np.ones(len(matrix), dtype=bool)
+        left, right = self.rules[t]
+        for v, b in left.items() :
+            en &= matrix[:,col[v]] == b
+        for v, b in right.items() :
+            loop &= matrix[:,col[v]] == b
+        return en & ~loop
+    cdef object _fire_rows (LTS self, object matrix, str t, dict col) :
+        # the rows obtained by firing rule or constraint t on all rows of matrix
+        cdef object rows = matrix.copy()
+        cdef str v
+        for v, b in self.rules[t][1].items() :
+            rows[:,col[v]] = b
+        return rows
+    cdef tuple _stabilise (LTS self, object parents, object rows, list consts,
+                           dict col) :
+        # apply constraints on rows until stable ones are reached, keeping track
+        # of the parent row from which each row comes
+        cdef list outp = [], outr = []
+        cdef set seen = set()
+        cdef object cen, en, keep
+        cdef str t
+        while len(rows) :
+            cen = np.zeros(len(rows), dtype=bool)
+            nextp, nextr = [], []
+            for t in consts :
+                en = self._enabled_rows(rows, t, col)
+                cen |= en
+                nextp.append(parents[en])
+                nextr.append(self._fire_rows(rows[en], t, col))
+            outp.append(parents[~cen])
+            outr.append(rows[~cen])
+            parents = np.concatenate(nextp)
+            rows = np.vstack(nextr)
+            keep = np.array([(p, r.tobytes()) not in seen
+                             and not seen.add((p, r.tobytes()))
+                             for p, r in zip(parents, np.packbits(rows, axis=1))],
+                            dtype=bool)
+            parents, rows = parents[keep], rows[keep]
+        return np.concatenate(outp), np.vstack(outr)
+    cpdef dict matrix_graph_props (LTS self, object matrix, object loops) :
+        """graph properties of each state in a matrix of states
+
+        This is like calling `graph_props` on each state separately, except
+        that each property is computed at once for all the states when
+        possible, that is for all the properties that test how states relate
+        to a set of states of the LTS (like `is_init`, `isin_dead`, etc.) as
+        well as for `is_hull` and `is_scc`.
+
+        Parameters:
+         - `matrix` (`numpy.ndarray`): states as returned by `matrix`
+         - `loops` (`numpy.ndarray`): which states have a transition to themselves
+        Returns: a `dict` that maps properties names to arrays of `bool`
+        """
+        cdef dict props = {}
+        cdef dict member = {}
+        cdef str name, kind, what
+        cdef object states
+        for name, (kind, what) in GRAPH_PROPS.items() :
+            states = None if what is None else getattr(self, what)
+            if name == "is_hull" :
+                props[name] = np.asarray(loops, dtype=bool)
+            elif name == "is_scc" :
+                props[name] = np.zeros(len(matrix), dtype=bool)
+            elif isinstance(states, sdd) :
+                if what not in member :
+                    member[what] = self.member(matrix, states)
+                if kind == "has" :
+                    props[name] = member[what]
+                elif kind == "is" :
+                    props[name] = member[what] & (len(states) == 1)
+                else :
+                    props[name] = member[what] & (len(states) > 1)
+            else :
+                props[name] = np.array([self._graph_prop(name, self._row_state(r), {})
+                                        for r in matrix], dtype=bool)
+        return props
+    cdef sdd _row_state (LTS self, object row) :
+        # the singleton set of states corresponding to a row of a matrix
+        cdef ddd d = ddd.one()
+        cdef int i
+        for i in range(len(self.vars) - 1, -1, -1) :
+            d = ddd.from_range(self.vars[i], int(row[i]), int(row[i]), d)
+        return d2s(d)
+    cpdef object count_matrix (LTS self, list parts) :
+        """count in how many states each variable is on, for several sets of states
+
+        All the sets of states are traversed at once, with the counts
+        computed for each DDD node memoized and shared among them, which
+        avoids to traverse again the DDD nodes they have in common. Counts
+        are cached on `Component` instances and reused when already known.
+
+        Parameters:
+         - `parts` (`list`): a series of `ddd.sdd` or `Component` instances
+        Returns: a `numpy.ndarray` whose rows correspond to `parts` and columns
+        to the variables as ordered in attribute `vars`
+        """
+        cdef dict col = {v : i for i, v in enumerate(self.vars)}
+        cdef dict memo = {}
+        cdef object dtype = int if len(self.states) < 2**62 else object
+        cdef object mat = np.zeros((len(parts), len(col)), dtype=dtype)
+        cdef Component compo
+        cdef int i
+        for i, part in enumerate(parts) :
+            if isinstance(part, Component) :
+                compo = <Component>part
+                if compo._counts is None :
+                    compo._set_counts(self._count_vec(s2d(compo.states), memo,
+                                                      col, dtype))
+                for v, n in compo._counts.items() :
+                    mat[i,col[v]] = n
+            else :
+                mat[i] = self._count_vec(s2d(part), memo, col, dtype)
+        return mat
+    cdef object _count_vec (LTS self, ddd head, dict memo, dict col, object dtype) :
+        # vector of the numbers of states below head in which each variable is on
+        cdef object ret
+        cdef str var
+        cdef val_t val
+        cdef ddd child
+        if head in memo :
+            return memo[head]
+        ret = np.zeros(len(col), dtype=dtype)
+        if not head.stop() :
+            for var, num, val, child in head.edges() :
+                ret += self._count_vec(child, memo, col, dtype)
+                if val :
+                    ret[col[var]] += len(child)
+        memo[head] = ret
+        return ret
     cpdef sdd add_prop (LTS self, str prop, sdd states, bint union=False, str alias="") :
         """adds a property to the LTS
 
@@ -460,7 +1075,70 @@ cpdef enum setrel :
 
 ctypedef unsigned long long CompoID
 
-cdef dict _CompoCache = {}
+cdef class _Interning (object) :
+    # numbering of components so that the existing components that have the
+    # same states and LTS have the same number, while the numbers of the
+    # components that do not exist anymore are forgotten (but never reused)
+    cdef dict _num  # (states, lts) => number
+    cdef dict _refs # number => [(states, lts), live instances]
+    cdef CompoID _next
+    def __cinit__ (_Interning self) :
+        self._num = {}
+        self._refs = {}
+        self._next = 0
+    cdef CompoID acquire (_Interning self, tuple key) :
+        cdef CompoID num
+        if key in self._num :
+            num = self._num[key]
+        else :
+            num = self._next
+            self._next += 1
+            self._num[key] = num
+            self._refs[num] = [key, 0]
+        self._refs[num][1] += 1
+        return num
+    cdef CompoID hold (_Interning self, tuple key, CompoID num) :
+        # `num` was obtained otherwise, eg, loaded from a file, return the
+        # number actually given: that of the existing components with the
+        # same states and LTS if any, `num` if it is not used yet, or a new
+        # number if it is used by other components
+        if key in self._num :
+            num = self._num[key]
+        elif num in self._refs :
+            return self.acquire(key)
+        else :
+            self._num[key] = num
+            self._refs[num] = [key, 0]
+            self._next = max(self._next, num + 1)
+        self._refs[num][1] += 1
+        return num
+    cdef void release (_Interning self, CompoID num) :
+        cdef list ref = self._refs.get(num)
+        if ref is None :
+            return
+        ref[1] -= 1
+        if ref[1] <= 0 :
+            del self._refs[num]
+            if self._num.get(ref[0]) == num :
+                del self._num[ref[0]]
+
+cdef _Interning _CompoCache = _Interning()
+
+def interning_stats () :
+    """memory used by components numbering
+
+    Returns: a `dict` with
+     - `"components"`: number of distinct components numbered
+     - `"instances"`: number of existing `Component` instances
+     - `"lts"`: number of distinct LTS these components belong to
+     - `"next"`: next number to be given to a component
+     - `"rss"`: resident memory of the process (in bytes)
+    """
+    return {"components" : len(_CompoCache._refs),
+            "instances" : sum(r[1] for r in _CompoCache._refs.values()),
+            "lts" : len({id(r[0][1]) for r in _CompoCache._refs.values()}),
+            "next" : _CompoCache._next,
+            "rss" : psutil.Process().memory_info().rss}
 
 cdef class Component (object) :
     """a set of states with properties
@@ -488,13 +1166,22 @@ cdef class Component (object) :
      - `split_props`: a `dict` that map textual properties (`str`) to `setrel`,
        limited to properties that have been used to split components as explained above
      - `lts`: the `LTS` from which the component is originated
+
+    The images of the component's states through the LTS relations are
+    computed on demand and cached, see methods `pre`, `post`, `tpre`,
+    and `tpost`.
     """
     cdef readonly CompoID num
     cdef readonly sdd states
     cdef readonly dict graph_props
     cdef readonly dict split_props
     cdef readonly LTS lts
-    cdef readonly tuple on, off
+    cdef tuple _on, _off
+    cdef dict _counts
+    cdef object _size
+    cdef sdd _pre, _post
+    cdef dict _tpre, _tpost
+    cdef bint _interned
     def __cinit__ (Component self, LTS lts, sdd states, dict gp={}, dict sp={}) :
         self.lts = lts
         self.states = states
@@ -510,35 +1197,59 @@ cdef class Component (object) :
          - `sp`: a `dict` of split properties
         Returns: newly created `Component`
         """
-        global _CompoCache
-        cdef set on, off
-        if (states, lts) in _CompoCache :
-            self.num = _CompoCache[states, lts]
-        else :
-            _CompoCache[states, lts] = self.num = len(_CompoCache)
-        on, off = self.on_off()
-        self.on = tuple(on)
-        self.off = tuple(off)
+        self.num = _CompoCache.acquire((states, lts))
+        self._interned = True
     cpdef dict dump (Component self) :
         return {"DDD" : [s2d(self.states)],
                 "num" : self.num,
                 "graph_props" : self.graph_props,
                 "split_props" : self.split_props,
                 "on" : self.on,
-                "off" : self.off}
+                "off" : self.off,
+                "size" : len(self)}
+    @staticmethod
+    def make (LTS lts, sdd states, dict gp, dict sp, on, off) :
+        """create a `Component` whose always-on and always-off variables are known
+
+        This is like calling `Component(lts, states, gp, sp)` but `on` and `off`
+        are not computed from the states.
+
+        Parameters:
+         - `lts`: the `LTS` from which the component is originated
+         - `states`: the `ddd.sdd` containing the states of the component
+         - `gp`: a `dict` of graph properties
+         - `sp`: a `dict` of split properties
+         - `on`, `off`: the always-on and always-off variables
+        Returns: newly created `Component`
+        """
+        cdef Component compo = Component.__new__(Component, lts, states, gp, sp)
+        compo.num = _CompoCache.acquire((states, lts))
+        compo._interned = True
+        compo._on = tuple(on)
+        compo._off = tuple(off)
+        return compo
     @classmethod
     def load (cls, dump, lts) :
         cdef Component compo = Component.__new__(Component,
                                                  lts,
                                                  d2s(dump["DDD"][0]),
                                                  dump["graph_props"],
-                                                 dump["split_props"])
+                                                 {p : setrel(r) for p, r
+                                                  in dump["split_props"].items()})
         compo._load(dump)
         return compo
+    def __dealloc__ (Component self) :
+        # the cache may have been freed already at interpreter shutdown
+        if self._interned and _CompoCache is not None :
+            _CompoCache.release(self.num)
     cdef void _load (Component self, dict dump) :
-        self.num = dump["num"]
-        self.on = dump["on"]
-        self.off = dump["off"]
+        # the saved number is kept unless it is used by other components
+        self.num = _CompoCache.hold((self.states, self.lts), dump["num"])
+        self._interned = True
+        self._on = tuple(dump["on"])
+        self._off = tuple(dump["off"])
+        if "size" in dump :
+            self._size = dump["size"]
     cpdef Component copy (Component self, lts=None) :
         cdef Component compo
         if lts is None :
@@ -550,12 +1261,42 @@ cdef class Component (object) :
         compo._copy(self)
         return compo
     cdef void _copy (Component self, Component other) :
-        self.num = other.num
-        self.on = other.on
-        self.off = other.off
+        # LTS copies share their relations so cached images remain valid
+        self.num = _CompoCache.hold((self.states, self.lts), other.num)
+        self._interned = True
+        self._on = other._on
+        self._off = other._off
+        self._counts = other._counts
+        self._size = other._size
+        self._pre = other._pre
+        self._post = other._post
+        self._tpre = other._tpre
+        self._tpost = other._tpost
     def __len__ (Component self) :
         "number of states in the component"
-        return len(self.states)
+        if self._size is None :
+            self._size = len(self.states)
+        return self._size
+    @property
+    def on (Component self) :
+        "the `tuple` of always-on variables, computed on demand"
+        if self._on is None :
+            self._on_off()
+        return self._on
+    @property
+    def off (Component self) :
+        "the `tuple` of always-off variables, computed on demand"
+        if self._off is None :
+            self._on_off()
+        return self._off
+    cdef void _set_counts (Component self, object vec) :
+        # cache counts given as a vector ordered as the LTS variables
+        self._counts = {v : n for v, n in zip(self.lts.vars, vec.tolist()) if n}
+    cdef void _on_off (Component self) :
+        cdef set on, off
+        on, off = self.on_off()
+        self._on = tuple(on)
+        self._off = tuple(off)
     def __hash__ (Component self) :
         return hash((self.states, self.lts))
     def __eq__ (Component self, Component other) :
@@ -578,6 +1319,48 @@ cdef class Component (object) :
             else :
                 props[r].add(p)
         return tuple(map(frozenset, props))
+    cpdef sdd pre (Component self) :
+        "predecessors of the component's states (computed once and cached)"
+        if self._pre is None :
+            self._pre = self.lts.pred(self.states)
+        return self._pre
+    cpdef sdd post (Component self) :
+        "successors of the component's states (computed once and cached)"
+        if self._post is None :
+            self._post = self.lts.succ(self.states)
+        return self._post
+    cpdef dict tpost (Component self) :
+        """successors of the component's states through each rule and constraint
+        (computed once and cached)
+
+        Returns: a `dict` mapping transitions names to `ddd.sdd`
+        """
+        cdef str t
+        cdef shom h
+        if self._tpost is None :
+            self._tpost = {t : h(self.states) for t, h in self.lts.tsucc.items()}
+        return self._tpost
+    cpdef dict tpre (Component self) :
+        """predecessors of the component's states through each rule and constraint
+        (computed once and cached)
+
+        Returns: a `dict` mapping transitions names to `ddd.sdd`
+        """
+        cdef str t
+        cdef shom h
+        if self._tpre is None :
+            self._tpre = {t : h(self.states) for t, h in self.lts.tpred.items()}
+        return self._tpre
+    cdef sdd _pre_of (Component self, sdd states) :
+        # predecessors of states, using the cache if states are the component's
+        if states == self.states :
+            return self.pre()
+        return self.lts.pred(states)
+    cdef sdd _post_of (Component self, sdd states) :
+        # successors of states, using the cache if states are the component's
+        if states == self.states :
+            return self.post()
+        return self.lts.succ(states)
     cdef void _update_prop (Component self, dict pdict, str prop, sdd states) :
         # update pdict[prop] with appropriate setrel to denote the relation of states
         # wrt the prop evaluated as a set of states on the underlying LTS
@@ -636,27 +1419,25 @@ cdef class Component (object) :
         cdef sdd diff = self.states - pstates
         self._update_prop(self.split_props, prop, self.states)
         if intr and diff :
-            return self._make_split(intr), self._make_split(diff)
+            return self._make_splits([intr, diff])
         elif intr :
             return self, None
         else :
             return None, self
-    cdef Component _make_split (Component self, sdd part) :
+    cdef Component _make_split (Component self, sdd part, dict graph_props=None) :
         # updates the component's properties wrt a part of its states and
         # returns a new Component for these states
-        cdef dict graph_props = self._copy_graph_props(part)
         cdef dict split_props = {}
         cdef str p
         cdef sdd s
+        if graph_props is None :
+            graph_props = self._copy_graph_props(part)
         for p in self.split_props :
             self._update_prop(split_props, p, part)
         return Component(self.lts, part, graph_props, split_props)
     cdef dict _copy_graph_props (Component self, sdd states) :
         # return an updated graph_props for a subset of states by querying the LTS
-        cdef str p
-        cdef bint b
-        return {p : getattr(self.lts, p)(states)
-                for p, b in self.graph_props.items()}
+        return self.lts.graph_props_many([states], list(self.graph_props))[0]
     def merge (Component self, Component first, *rest) :
         """merge a component with others
 
@@ -691,38 +1472,80 @@ cdef class Component (object) :
         Yields: pairs `trans, comp` where transition `trans` allows to reach `compo`
         """
         cdef str t
-        cdef shom h
+        cdef sdd post, img
+        cdef Component c
+        cdef list targets
+        # only the components reached by the whole successor image are tested
+        # against each rule's image
+        post = self.post()
+        targets = [c for c in others
+                   if self.states != c.states and post & c.states]
+        if not targets :
+            return
+        for t, img in self.tpost().items() :
+            for c in targets :
+                if img & c.states :
+                    yield t, c
+    def edges (Component self, Partition part) :
+        """computes the transitions from a component to those in a partition
+
+        This is the same as `succ(*part.components)` but the components
+        reached by each transition are searched using the partition index,
+        which is much faster when there are many components.
+
+        Parameters:
+         - `part`: a `Partition` of candidate successor components
+        Yields: pairs `trans, comp` where transition `trans` allows to reach `compo`
+        """
+        cdef str t
+        cdef sdd img
         cdef Component c
-        cdef list s = []
-        for t, h in self.lts.tsucc.items() :
-            for c in others :
-                if self.states != c.states and h(self.states) & c.states :
+        if not part.hits(self.post()) :
+            return
+        for t, img in self.tpost().items() :
+            for c in part.hits(img) :
+                if self.states != c.states :
                     yield t, c
-        return s
     def explicit (Component self) :
         """splits a component into one-state sub-components
 
+        The states are enumerated into a matrix (see `LTS.matrix`) and the
+        properties of all the states are computed at once from it.
+
         Yields: a series of `Component`
         """
-        cdef ddd state
         if len(self) == 1 :
             yield self
         else :
-            for state in s2d(self.states).explicit() :
-                yield self._explicit(d2s(state))
-    cdef Component _explicit (Component self, sdd state) :
-        # performs the properties update of a singleton component and
-        # returns the corresponding `Component`
-        cdef dict gp = {}
-        cdef dict sp = {}
+            yield from self._explicit()
+    cdef list _explicit (Component self) :
+        # one singleton component for each state, with its properties
+        # computed from the matrix of the states
+        cdef LTS lts = self.lts
+        cdef object mat = lts.matrix(self.states)
+        cdef object loops = np.zeros(len(mat), dtype=bool)
+        cdef dict gps, codes = {}
+        cdef list found = []
         cdef str p
-        cdef setrel r
         cdef sdd pstates
-        for p in self.graph_props :
-            gp[p] = getattr(self.lts, p)(state)
-        for p, r in self.split_props.items() :
-            self._update_prop(sp, p, state)
-        return Component(self.lts, state, gp=gp, sp=sp)
+        cdef int i
+        src, dst, _ = lts.matrix_succ(mat)
+        loops[src[src == dst]] = True
+        gps = lts.matrix_graph_props(mat, loops)
+        for p in self.split_props :
+            pstates = lts.props[p]
+            codes[p] = np.where(lts.member(mat, pstates),
+                                int(setrel.EQUALS if len(pstates) == 1
+                                    else setrel.ISIN),
+                                int(setrel.HASNO))
+        for i, row in enumerate(mat) :
+            found.append(Component.make(
+                lts, lts._row_state(row),
+                {p : bool(gps[p][i]) for p in self.graph_props},
+                {p : setrel(codes[p][i]) for p in codes},
+                [v for v, b in zip(lts.vars, row) if b],
+                [v for v, b in zip(lts.vars, row) if not b]))
+        return found
     cpdef tuple topo_split (Component self,
                             bint split_init=True,
                             bint split_entries=True,
@@ -762,12 +1585,12 @@ cdef class Component (object) :
         else :
             init = sdd.empty()
         if split_entries :
-            entries = self.lts.succ(self.lts.pred(rest) - rest) & rest
+            entries = self.lts.succ(self._pre_of(rest) - rest) & rest
             rest -= entries
         else :
             entries = sdd.empty()
         if split_exits :
-            exits = self.lts.pred(self.lts.succ(rest) - rest) & rest
+            exits = self.lts.pred(self._post_of(rest) - rest) & rest
             rest -= exits
         else :
             exits = sdd.empty()
@@ -781,17 +1604,22 @@ cdef class Component (object) :
             rest -= dead
         else :
             dead = sdd.empty()
-        return (self._make_split(init) if init else None,
-                self._make_split(entries) if entries else None,
-                self._make_split(exits) if exits else None,
-                self._make_split(hull) if hull else None,
-                self._make_split(dead) if dead else None,
-                self._make_split(rest) if rest else None)
+        return self._make_splits([init, entries, exits, hull, dead, rest])
+    cdef tuple _make_splits (Component self, list parts) :
+        # like _make_split for several parts at once, with their graph
+        # properties computed in one batch, empty parts yield None
+        cdef list found = [p for p in parts if p]
+        cdef dict gp = dict(zip(found,
+                                self.lts.graph_props_many(found,
+                                                          list(self.graph_props))))
+        cdef sdd p
+        return tuple(self._make_split(p, gp[p]) if p else None for p in parts)
     cpdef dict count (Component self) :
         "return the number of on occurrences of each variable"
         cdef dict seen = {}
-        cdef ddd d = s2d(self.states)
-        return self._count(d, seen)
+        if self._counts is None :
+            self._counts = self._count(s2d(self.states), seen)
+        return dict(self._counts)
     cpdef dict _count (Component self, ddd head, dict seen) :
         cdef dict ret, sub
         cdef str var, v
@@ -817,7 +1645,7 @@ cdef class Component (object) :
         cdef set on = set()
         cdef set off = set()
         cdef unsigned long long s, size
-        size = len(self.states)
+        size = len(self)
         for var in self.lts.vars :
             s = cnt.get(var, 0)
             if s == 0 :
@@ -837,3 +1665,119 @@ cdef class Component (object) :
         Return: a sympy Boolean formulas
         """
         return self.lts.form(self.states, variables, normalise)
+
+cdef class Partition (object) :
+    """an index of disjoint components to find those intersecting a set of states
+
+    The index is a balanced binary tree whose leaves are the components and
+    whose inner nodes hold the union of the states below them, so that the
+    components that intersect a set of states are found by bisection, that
+    is, with a number of intersections that is logarithmic in the number of
+    components (for each component found).
+
+    Attributes:
+     - `components` (`tuple`): the indexed `Component` instances
+    """
+    cdef readonly tuple components
+    cdef list _union # node => union of the states below it
+    cdef list _sub   # node => (left, right) nodes or the index of a component
+    def __cinit__ (Partition self, components) :
+        self.components = tuple(components)
+        self._union = []
+        self._sub = []
+        if self.components :
+            self._build(0, len(self.components))
+    cdef int _build (Partition self, int lo, int hi) :
+        cdef int node = len(self._union)
+        cdef int left, right
+        self._union.append(None)
+        self._sub.append(None)
+        if hi - lo == 1 :
+            self._union[node] = (<Component>self.components[lo]).states
+            self._sub[node] = lo
+        else :
+            left = self._build(lo, (lo + hi) // 2)
+            right = self._build((lo + hi) // 2, hi)
+            self._union[node] = self._union[left] | self._union[right]
+            self._sub[node] = (left, right)
+        return node
+    def __len__ (Partition self) :
+        return len(self.components)
+    cpdef list hits (Partition self, sdd states) :
+        "return the `list` of components whose states intersect `states`"
+        cdef list found = []
+        cdef list todo
+        cdef int node
+        if not self.components :
+            return found
+        todo = [0]
+        while todo :
+            node = todo.pop()
+            if not (states & self._union[node]) :
+                continue
+            sub = self._sub[node]
+            if isinstance(sub, tuple) :
+                todo.append(sub[1])
+                todo.append(sub[0])
+            else :
+                found.append(self.components[sub])
+        return found
+
+def pack (objs) :
+    """encode objects to be sent to another process
+
+    Parameters:
+     - `objs`: a `list` or `tuple` of `ddd.sdd`, `Component`, or `None`,
+       possibly nested
+    Returns: a picklable object to be decoded using `unpack`, where the sets
+    of states are serialized together so that they share their nodes
+    """
+    cdef list ddds = []
+    cdef object enc = _pack(objs, ddds)
+    if ddds :
+        return enc, archive.dumps_ddds(ddds)
+    return enc, b""
+
+cdef object _pack (object obj, list ddds) :
+    cdef dict dump
+    if obj is None :
+        return None
+    elif isinstance(obj, sdd) :
+        ddds.append(s2d(obj))
+        return len(ddds) - 1
+    elif isinstance(obj, Component) :
+        dump = obj.dump()
+        ddds.append(dump["DDD"][0])
+        dump["DDD"] = [len(ddds) - 1]
+        dump["split_props"] = {p : int(r) for p, r in dump["split_props"].items()}
+        return dump
+    else :
+        return [_pack(o, ddds) for o in obj]
+
+def unpack (LTS lts, packed) :
+    """decode objects encoded by `pack`
+
+    Sequences are decoded as `tuple`s, and components are numbered as if
+    they were created in the current process.
+
+    Parameters:
+     - `lts`: the `LTS` the decoded components belong to
+     - `packed`: objects encoded by `pack`
+    Returns: the decoded objects
+    """
+    enc, data = packed
+    cdef list states = [d2s(d) for d in archive.loads_ddds(data)] if data else []
+    return _unpack(lts, enc, states)
+
+cdef object _unpack (LTS lts, object enc, list states) :
+    if enc is None :
+        return None
+    elif isinstance(enc, int) :
+        return states[enc]
+    elif isinstance(enc, dict) :
+        return Component.make(lts, states[enc["DDD"][0]], enc["graph_props"],
+                              {p : setrel(r) for p, r
+                               in enc["split_props"].items()},
+                              enc["on"], enc["off"])
+    else :
+        return tuple(_unpack(lts, e, states) for e in enc)
@@ -1,5 +1,5 @@
 import ast, functools, operator
-from collections import defaultdict
+from collections import defaultdict, ChainMap
 
 import tl, pymc as mc
 
@@ -11,14 +11,18 @@ class Prop (object) :
         self.model = model
         self.lts = lts
         self.prop = prop
+        self.compo = None
     @property
     def cache (self) :
         key = tuple(getattr(self, name) for name in self._cache_as)
         return self._cache.setdefault(key, {})
-    def __call__ (self, states) :
+    def __call__ (self, states, compo=None) :
+        # compo is the Component whose states are checked, if any,
+        # which allows to reuse its cached images
         cache = self.cache
         if states not in cache :
             self.states = states
+            self.compo = compo
             cache[states] = self._get_states(states)
         return cache[states]
     def _get_states (self, states) :
@@ -62,6 +66,14 @@ class StateProp (Prop) :
                 raise TypeError(f"get() takes 2 positional arguments but"
                                 f" {len(default)+1} were given")
             raise
+    def _pre (self, states) :
+        if self.compo is not None and self.compo.states == states :
+            return self.compo.pre()
+        return self.lts.pred(states)
+    def _post (self, states) :
+        if self.compo is not None and self.compo.states == states :
+            return self.compo.post()
+        return self.lts.succ(states)
     def _do_hull (self, states=None) :
         if states is None :
             states = self.states
@@ -75,7 +87,7 @@ class StateProp (Prop) :
     def _do_succ (self, states=None) :
         if states is None :
             states = self.states
-        return self.lts.succ(states)
+        return self._post(states)
     def _do_succ_s (self, states=None) :
         if states is None :
             states = self.states
@@ -87,7 +99,7 @@ class StateProp (Prop) :
     def _do_pred (self, states=None) :
         if states is None :
             states = self.states
-        return self.lts.pred(states)
+        return self._pre(states)
     def _do_pred_s (self, states=None) :
         if states is None :
             states = self.states
@@ -99,11 +111,11 @@ class StateProp (Prop) :
     def _do_entries (self, states=None) :
         if states is None :
             states = self.states
-        return self.lts.succ(self.lts.pred(states) - states) & states
+        return self.lts.succ(self._pre(states) - states) & states
     def _do_exits (self, states=None) :
         if states is None :
             states = self.states
-        return self.lts.pred(self.lts.succ(states) - states) & states
+        return self.lts.pred(self._post(states) - states) & states
     def _do_oneway (self, trans, states=None) :
         if states is None :
             states = self.lts.states
@@ -168,11 +180,11 @@ class AnyProp (Prop) :
         self._checkers = list(self._order)
         self._check = None
         self.syntax = "GUESS"
-    def __call__ (self, states) :
+    def __call__ (self, states, compo=None) :
         errors = []
         while True :
             try :
-                return self._check(states)
+                return self._check(states, compo)
             except Exception as err :
                 if self._check is not None :
                     errors.append((self.syntax, f"{err.__class__.__name__}: {err}"))
@@ -187,3 +199,101 @@ class AnyProp (Prop) :
                 else :
                     raise ValueError(f"Could not evaluate formula {self.prop!r}\n"
                                      + "\n".join(f"[{s}] {e}" for s, e in errors))
+
+class SharedProps (object) :
+    """evaluate a batch of properties on a whole LTS
+
+    State properties are parsed and their subexpressions are evaluated only
+    once for the whole batch, identical subexpressions being recognised from
+    their syntax trees. Temporal logic properties are evaluated once on the
+    states of the LTS. Properties that depend on the states they are checked
+    against (like `hull()` that refers implicitly to these states) cannot be
+    shared and are left to `AnyProp`.
+    """
+    # functions that default to the checked states when called without argument
+    _local = {"hull", "comp", "succ", "succ_s", "succ_o", "pred", "pred_s",
+              "pred_o", "entries", "exits"}
+    _binops = {ast.BitAnd : operator.and_,
+               ast.BitOr : operator.or_,
+               ast.BitXor : operator.xor,
+               ast.Sub : operator.sub}
+    # nodes whose subexpressions cannot be evaluated on their own
+    _opaque = (ast.Lambda, ast.ListComp, ast.SetComp, ast.DictComp,
+               ast.GeneratorExp, ast.NamedExpr, ast.Starred, ast.JoinedStr,
+               ast.Slice)
+    def __init__ (self, model, lts) :
+        self.model = model
+        self.lts = lts
+        self._env = StateProp(model, lts, "ALL")
+        self._env.states = lts.states
+        self._memo = {}
+        self.hits = 0
+    def __len__ (self) :
+        "number of distinct subexpressions evaluated so far"
+        return len(self._memo)
+    def __call__ (self, prop) :
+        """evaluate `prop` on the whole LTS
+
+        Returns: the states validating `prop`, or `None` if it cannot be
+        evaluated independently of the states it is checked against
+        """
+        for cls in (CTLProp, ARCTLProp) :
+            try :
+                return cls(self.model, self.lts, prop)(self.lts.states)
+            except Exception :
+                pass
+        try :
+            tree = ast.parse(prop, mode="eval").body
+        except SyntaxError :
+            return None
+        for node in ast.walk(tree) :
+            if (isinstance(node, ast.Call)
+                and isinstance(node.func, ast.Name)
+                and node.func.id in self._local
+                and not (node.args or node.keywords)) :
+                return None
+        try :
+            return self._eval(tree)
+        except Exception :
+            return None
+    def _eval (self, node) :
+        key = ast.dump(node)
+        if key in self._memo :
+            self.hits += 1
+            return self._memo[key]
+        if isinstance(node, ast.BinOp) and type(node.op) in self._binops :
+            val = self._binops[type(node.op)](self._eval(node.left),
+                                              self._eval(node.right))
+        elif (isinstance(node, ast.Call)
+              and isinstance(node.func, ast.Name)
+              and not node.keywords) :
+            val = self._env[node.func.id](*(self._eval(a) for a in node.args))
+        elif isinstance(node, ast.Name) :
+            val = self._env[node.id]
+        else :
+            val = self._generic(node)
+        self._memo[key] = val
+        return val
+    def _generic (self, node) :
+        # evaluate node with its direct subexpressions replaced by their values
+        # computed by _eval, so that they are shared even below other nodes
+        values = {}
+        def sub (child) :
+            if not isinstance(child, ast.expr) :
+                return child
+            name = f"__shared{len(values)}"
+            values[name] = self._eval(child)
+            return ast.copy_location(ast.Name(id=name, ctx=ast.Load()), child)
+        if any(isinstance(n, self._opaque) for n in ast.walk(node)) :
+            new = node
+        else :
+            fields = {}
+            for field, value in ast.iter_fields(node) :
+                if isinstance(value, list) :
+                    fields[field] = [sub(v) for v in value]
+                else :
+                    fields[field] = sub(value)
+            new = ast.fix_missing_locations(ast.copy_location(type(node)(**fields),
+                                                              node))
+        return eval(compile(ast.Expression(new), "<prop>", "eval"), {},
+                    ChainMap(values, self._env))
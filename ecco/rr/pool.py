@@ -0,0 +1,64 @@
+"""run independent jobs in forked worker processes
+
+Decision diagrams and homomorphisms cannot be sent to other processes,
+so the context of the jobs (typically an `LTS`) is stored in a module
+global just before the workers are forked, and each worker inherits it
+(copy-on-write). Jobs are called as `fun(context, *args)` where `fun` is
+a module-level function and `args` as well as the returned values must
+be picklable.
+
+Only the calling thread is copied into the forked workers, so if another
+thread holds a lock when they are forked (which may happen in a process
+running several threads, like a Jupyter kernel), a worker needing that lock
+is blocked. Only the `fork` start method allows the workers to inherit the
+context, so in such a case, jobs should rather be run in the current
+process (`processes=1`). Workers are never forked from a worker process, in
+which the jobs are always run in the current process.
+"""
+
+import multiprocessing, os
+
+_context = None
+
+def _call (job) :
+    fun, args = job
+    return fun(_context, *args)
+
+def workers (processes=None) :
+    "actual number of worker processes to be used for `processes`"
+    if os.name != "posix" :
+        return 1
+    elif multiprocessing.current_process().daemon :
+        # workers cannot have children
+        return 1
+    elif processes is None or processes <= 0 :
+        return os.cpu_count() or 1
+    else :
+        return processes
+
+def imap (fun, context, jobs, processes=None, chunksize=1) :
+    """call `fun(context, *args)` for each `args` in `jobs`
+
+    Arguments:
+     - `fun`: a module-level function
+     - `context`: first argument passed to each call
+     - `jobs`: a sequence of tuples of arguments
+     - `processes` (`int=None`): number of worker processes, all the CPUs
+       are used if `None` or `0`, and calls are made in the current process
+       if `1`
+     - `chunksize` (`int=1`): number of jobs sent at once to a worker
+    Yields: the results of the calls, in the order of `jobs`
+    """
+    global _context
+    jobs = list(jobs)
+    processes = min(workers(processes), len(jobs))
+    if processes <= 1 :
+        for args in jobs :
+            yield fun(context, *args)
+        return
+    _context = context
+    try :
+        with multiprocessing.get_context("fork").Pool(processes) as pool :
+            yield from pool.imap(_call, [(fun, args) for args in jobs], chunksize)
+    finally :
+        _context = None
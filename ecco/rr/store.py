@@ -0,0 +1,169 @@
+"""append-only stores of component graphs
+
+A store is a directory holding:
+
+ - `graphs.jsonl`: the index, with one JSON record appended for each saved
+   graph, made of the dumps of the graph, its LTS and its components, where
+   each DDD is replaced by the hash of its content
+ - `ddd/`: one compressed file for each distinct DDD, named after the hash
+   of its content
+ - `gal/`: the GAL files of the saved LTS, also named after their hash
+
+So, the DDD shared by several graphs (the LTS states, properties, and
+unchanged components) are written only once, and saving a graph derived
+from another one writes only its new DDD. Note that sharing is per whole
+DDD: a new DDD is written entirely even if it shares most of its nodes with
+DDD already in the store (eg, the two parts of a split component).
+
+Several processes may save graphs to the same store concurrently: DDD and
+GAL files are written atomically, and appending to the index is protected by
+an exclusive lock.
+"""
+
+import fcntl, hashlib, json, os, pathlib, time, zlib
+
+from . import archive, ComponentGraph
+from .. import load as load_model
+
+class SessionStore (object) :
+    """a store of component graphs
+
+    Graphs are saved under names, saving a graph under an existing name
+    hides the previously saved graph but does not remove it from the store.
+    """
+    def __init__ (self, path) :
+        """open a store, creating it if needed
+
+        Arguments:
+         - `path` (`str`): directory of the store
+        """
+        self.path = pathlib.Path(path)
+        (self.path / "ddd").mkdir(parents=True, exist_ok=True)
+        (self.path / "gal").mkdir(exist_ok=True)
+        self._index = self.path / "graphs.jsonl"
+        self._index.touch()
+        self._records = {} # name => record
+        self._offset = 0   # how much of the index has been read
+        self._d2h = {}     # ddd => hash
+        self._h2d = {}     # hash => ddd
+        self._refresh()
+    def _refresh (self) :
+        # read the records appended to the index since last read
+        with open(self._index, "rb") as inf :
+            inf.seek(self._offset)
+            for line in inf :
+                if not line.endswith(b"\n") :
+                    # record being written
+                    break
+                record = json.loads(line)
+                self._records[record["name"]] = record
+                self._offset += len(line)
+    def __contains__ (self, name) :
+        self._refresh()
+        return name in self._records
+    def __iter__ (self) :
+        self._refresh()
+        yield from self._records
+    def __len__ (self) :
+        self._refresh()
+        return len(self._records)
+    def info (self, name) :
+        """information about a saved graph
+
+        Arguments:
+         - `name` (`str`): name of the graph
+        Returns: a `dict` with keys `"time"` (when the graph was saved),
+        `"size"` (its number of components), and `"history"` (the steps
+        that derived it, see `ComponentGraph.history`)
+        """
+        self._refresh()
+        record = self._records[name]
+        return {"time" : record["time"],
+                "size" : len(record["components"]),
+                "history" : record["history"]}
+    def _write (self, path, data) :
+        # write data to path, atomically so that concurrent writers are safe
+        if not path.exists() :
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+    def _put (self, d) :
+        # store one DDD and return its hash
+        h = self._d2h.get(d)
+        if h is None :
+            data = archive.dumps_ddds([d])
+            h = hashlib.sha1(data).hexdigest()
+            self._write(self.path / "ddd" / h, zlib.compress(data))
+            self._d2h[d] = h
+            self._h2d[h] = d
+        return h
+    def _get (self, h) :
+        # load one DDD from its hash
+        d = self._h2d.get(h)
+        if d is None :
+            data = zlib.decompress((self.path / "ddd" / h).read_bytes())
+            d = archive.loads_ddds(data)[0]
+            self._d2h[d] = h
+            self._h2d[h] = d
+        return d
+    def save (self, cg, name) :
+        """save a component graph
+
+        Arguments:
+         - `cg` (`ComponentGraph`): the graph to be saved
+         - `name` (`str`): name under which the graph is saved
+        """
+        dumps = [cg.dump(), cg.lts.dump(), *(c.dump() for c in cg.components)]
+        for dump in dumps :
+            dump["DDD"] = [self._put(d) for d in dump["DDD"]]
+        dump_cg, dump_lts, *dump_compos = dumps
+        gal = pathlib.Path(dump_lts["path"]).read_bytes()
+        dump_lts["gal"] = hashlib.sha1(gal).hexdigest()
+        self._write(self.path / "gal" / (dump_lts["gal"] + ".gal"), gal)
+        record = {"name" : name,
+                  "time" : time.time(),
+                  "history" : cg.history(),
+                  "depth" : cg._depth,
+                  "graph" : dump_cg,
+                  "lts" : dump_lts,
+                  "components" : dump_compos}
+        if hasattr(cg, "_cached_g") :
+            record["edges"] = [[e["src"], e["dst"], list(e["rules"])]
+                               for e in cg.g.es if e["src"] != e["dst"]]
+        line = json.dumps(record).encode("utf-8") + b"\n"
+        with open(self._index, "ab") as out :
+            # records from concurrent writers must not be interleaved
+            fcntl.flock(out, fcntl.LOCK_EX)
+            try :
+                out.write(line)
+                out.flush()
+            finally :
+                fcntl.flock(out, fcntl.LOCK_UN)
+    def load (self, name) :
+        """load a saved component graph
+
+        Arguments:
+         - `name` (`str`): name of the graph
+        Returns: the loaded `ComponentGraph` instance
+        """
+        self._refresh()
+        if name not in self._records :
+            raise KeyError(f"no graph named {name!r}")
+        record = json.loads(json.dumps(self._records[name]))
+        dump_cg = record["graph"]
+        dump_lts = record["lts"]
+        dump_compos = record["components"]
+        ddds = {h : self._get(h)
+                for dump in (dump_lts, *dump_compos)
+                for h in dump["DDD"]}
+        dump_lts["path"] = str(self.path / "gal" / (dump_lts["gal"] + ".gal"))
+        edges = None
+        if "edges" in record :
+            edges = {(src, dst) : set(rules)
+                     for src, dst, rules in record["edges"]}
+        _, model = load_model(str(dump_cg["model"]))
+        cg = ComponentGraph._from_dumps(model, dump_cg, dump_lts, dump_compos,
+                                        ddds, edges)
+        cg._history = tuple(record["history"])
+        cg._depth = record.get("depth", 0)
+        return cg
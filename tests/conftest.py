@@ -0,0 +1,12 @@
+import pathlib
+
+import pytest
+
+ROOT = pathlib.Path(__file__).parent.parent
+
+@pytest.fixture(scope="session")
+def termites () :
+    "the termites model from the documentation"
+    import ecco
+    _, model = ecco.load(str(ROOT / "doc" / "termites.rr"))
+    return model
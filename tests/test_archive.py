@@ -0,0 +1,77 @@
+import pytest
+
+pytest.importorskip("ddd")
+
+from ecco.rr import archive
+
+@pytest.mark.parametrize("codec", ["raw", "zlib", "lzma"])
+def test_sections (tmp_path, codec) :
+    path = tmp_path / "test.arc"
+    data = bytes(range(256)) * 17
+    with archive.Writer(str(path), codec, kind="test") as out :
+        out.add("data", data)
+        out.add_json("obj", {"answer" : 42, "list" : [1, 2, 3]})
+        out.add("small", b"x", codec="raw")
+    assert archive.is_archive(str(path))
+    with archive.Reader(str(path)) as inf :
+        assert inf.meta == {"kind" : "test"}
+        assert set(inf.sections) == {"data", "obj", "small"}
+        for sect in inf.sections.values() :
+            assert sect["offset"] % archive.ALIGN == 0
+        assert bytes(inf.read("data")) == data
+        assert inf.json("obj") == {"answer" : 42, "list" : [1, 2, 3]}
+        small = inf.read("small")
+        assert isinstance(small, memoryview)
+        assert bytes(small) == b"x"
+        del small
+
+def test_default_raw (tmp_path) :
+    path = tmp_path / "test.arc"
+    with archive.Writer(str(path)) as out :
+        out.add("data", b"hello")
+    with archive.Reader(str(path)) as inf :
+        assert inf.sections["data"]["codec"] == "raw"
+        view = inf.read("data")
+        assert isinstance(view, memoryview)
+        assert bytes(view) == b"hello"
+        del view
+
+def test_duplicated_section (tmp_path) :
+    with archive.Writer(str(tmp_path / "test.arc")) as out :
+        out.add("data", b"hello")
+        with pytest.raises(ValueError) :
+            out.add("data", b"world")
+
+def test_not_archive (tmp_path) :
+    path = tmp_path / "plain"
+    path.write_bytes(b"not an archive at all")
+    assert not archive.is_archive(str(path))
+    assert not archive.is_archive(str(tmp_path / "missing"))
+
+@pytest.mark.parametrize("codec", ["raw", "zlib"])
+def test_graph_roundtrip (tmp_path, termites, codec) :
+    pytest.importorskip("its")
+    from ecco.rr import ComponentGraph
+    cg = termites()
+    cg.g
+    path = str(tmp_path / "graph.ecco")
+    cg.save(path, codec=codec)
+    for lazy in (False, True) :
+        new = ComponentGraph.load(path, lazy=lazy)
+        assert sorted(new._nums()) == sorted(c.num for c in cg.components)
+        assert {c.num : c.states for c in new.components} \
+            == {c.num : c.states for c in cg.components}
+        assert new.lts.states == cg.lts.states
+        assert new._edges()[0] == cg._edges()[0]
+
+def test_lts_roundtrip (tmp_path, termites) :
+    pytest.importorskip("its")
+    from ecco.rr.lts import LTS
+    lts = termites(split=False).lts
+    path = str(tmp_path / "lts.ecco")
+    lts.save_file(path)
+    new = LTS.load_file(path)
+    assert new.states == lts.states
+    assert new.init == lts.init
+    assert new.dead == lts.dead
+    assert new.hull == lts.hull
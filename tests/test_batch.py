@@ -0,0 +1,71 @@
+import io, json, pathlib
+
+import pytest
+
+pytest.importorskip("ddd")
+pytest.importorskip("its")
+
+from ecco.rr.batch import Batch
+
+ROOT = pathlib.Path(__file__).parent.parent
+
+def _recipe (tmp_path, graphs) :
+    path = tmp_path / "recipe.json"
+    path.write_text(json.dumps({"model" : str(ROOT / "doc" / "termites.rr"),
+                                "store" : "store",
+                                "graphs" : graphs}))
+    return str(path)
+
+GRAPHS = {"base" : {"build" : {"split" : False}},
+          "sd" : {"from" : "base",
+                  "steps" : [["split", "Sd"], ["check", "Wk"]],
+                  "save" : "sd.ecco",
+                  "nodes" : "sd.csv"},
+          "topo" : {"from" : "base",
+                    "steps" : [["topo_split", {"dead" : False}]],
+                    "edges" : "topo.csv"}}
+
+def _run (path, processes) :
+    out = io.StringIO()
+    batch = Batch(path)
+    batch.run(processes, out)
+    return batch, [json.loads(line) for line in out.getvalue().splitlines()]
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_batch (tmp_path, termites, processes) :
+    path = _recipe(tmp_path, GRAPHS)
+    batch, records = _run(path, processes)
+    assert records[-1]["step"] == "total"
+    assert {r["graph"] for r in records[:-1]} == set(GRAPHS)
+    assert not any(r["cached"] for r in records)
+    assert (tmp_path / "sd.ecco").exists()
+    assert (tmp_path / "sd.csv").exists()
+    assert (tmp_path / "topo.csv").exists()
+    sd = batch.graph("sd")
+    ref = termites(split=False).split("Sd")
+    assert {c.states for c in sd.components} == {c.states for c in ref.components}
+    assert all("Wk" in c.split_props for c in sd.components)
+    # the sibling graph does not see the steps of sd
+    assert all("Sd" not in c.split_props for c in batch.graph("base").components)
+    # everything is reused when the recipe is run again
+    _, again = _run(path, processes)
+    assert all(r["cached"] for r in again if r["step"] == "load")
+    assert {r["graph"] for r in again if r["step"] == "load"} == set(GRAPHS)
+
+def test_changed_steps (tmp_path) :
+    path = _recipe(tmp_path, GRAPHS)
+    first = Batch(path)
+    graphs = dict(GRAPHS, sd=dict(GRAPHS["sd"], steps=[["split", "Wk"]]))
+    second = Batch(_recipe(tmp_path, graphs))
+    assert first.keys["base"] == second.keys["base"]
+    assert first.keys["topo"] == second.keys["topo"]
+    assert first.keys["sd"] != second.keys["sd"]
+
+@pytest.mark.parametrize("graphs", [
+    {"a" : {"from" : "b"}, "b" : {"from" : "a"}},
+    {"a" : {"from" : "missing"}},
+    {"a" : {"build" : {}, "from" : "a"}},
+    {"a" : {"build" : {}, "steps" : [["draw"]]}}])
+def test_invalid (tmp_path, graphs) :
+    with pytest.raises(ValueError) :
+        Batch(_recipe(tmp_path, graphs))
@@ -0,0 +1,47 @@
+import pytest
+
+pytest.importorskip("ddd")
+pytest.importorskip("its")
+
+from ecco.rr.ltsprop import SharedProps
+
+PROPS = ["Sd", "Sd & Wk", "Wk & Sd", "(Sd & Wk) | Te", "Sd - (Sd & Wk)",
+         "comp(Sd & Wk)", "succ(Sd)", "pred_s(DEAD)", "hull()",
+         "(Sd & Wk) if True else Te", "AG(Sd)", "EF(DEAD)"]
+
+def test_check_many (termites) :
+    one = termites().split("Sd")
+    many = one.branch()
+    ret = {}
+    for prop in PROPS :
+        try :
+            found = one.check(prop)
+        except Exception :
+            continue
+        for num, rels in found.items() :
+            ret.setdefault(num, {}).update(rels)
+    assert many.check_many(*(p for p in PROPS
+                             if any(p in r for r in ret.values()))) == ret
+    for c in one.components :
+        assert many[c.num].split_props == c.split_props
+
+def test_split_many (termites) :
+    props = ["Sd & Wk", "Te", "Sd"]
+    one = termites()
+    for prop in props :
+        one = one.split(prop)
+    many = termites().split_many(*props)
+    assert {c.states for c in one.components} == {c.states for c in many.components}
+
+def test_shared (termites) :
+    lts = termites().lts
+    shared = SharedProps(termites, lts)
+    assert shared("Sd & Wk") == lts.var2sdd("Sd") & lts.var2sdd("Wk")
+    size = len(shared)
+    hits = shared.hits
+    # the subexpression is shared below an unsupported node
+    assert shared("(Sd & Wk) if True else Te") == shared("Sd & Wk")
+    assert shared.hits > hits
+    assert len(shared) > size
+    # properties relative to the checked states are not shared
+    assert shared("hull()") is None
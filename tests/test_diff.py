@@ -0,0 +1,26 @@
+import pytest
+
+pytest.importorskip("ddd")
+pytest.importorskip("its")
+
+def test_diff_self (termites) :
+    cg = termites()
+    nodes, edges = cg.diff(cg)
+    assert str(nodes["left"].dtype) == "Int64"
+    assert str(nodes["right"].dtype) == "Int64"
+    assert not nodes["left"].isna().any()
+    assert not nodes["right"].isna().any()
+    assert (nodes["left"] == nodes["right"]).all()
+    assert nodes["states"].sum() == len(cg.lts.states)
+    assert edges.empty
+
+def test_diff_init (termites) :
+    small = termites(split=False)
+    large = termites(init="*", split=False)
+    nodes, edges = small.diff(large)
+    # all the states of small are in large
+    assert nodes["right"].notna().all()
+    only = nodes[nodes["left"].isna()]
+    assert only["states"].sum() == len(large.lts.states - small.lts.states)
+    common = nodes[nodes["left"].notna()]
+    assert common["states"].sum() == len(small.lts.states)
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+pytest.importorskip("ddd")
+pytest.importorskip("its")
+
+from ecco.rr.store import SessionStore
+
+def test_explicit (termites) :
+    cg = termites().split("Sd")
+    cg.check("Wk")
+    c = min(cg.components, key=len)
+    if len(c) < 2 :
+        pytest.skip("no small component to split")
+    new = cg.explicit(c.num, limit=0)
+    states = [n for n in new.components if n.num not in cg._c]
+    assert len(states) == len(c)
+    union = states[0].states
+    for s in states :
+        assert len(s) == 1
+        union = union | s.states
+        assert s.graph_props == cg.lts.graph_props_many([s.states],
+                                                        list(c.graph_props))[0]
+        assert set(s.split_props) == set(c.split_props)
+        on, off = s.on_off()
+        assert set(s.on) == set(on) and set(s.off) == set(off)
+    assert union == c.states
+    # each state has the relation to properties of a singleton
+    check = new.branch()
+    check.check("Sd", "Wk", *(s.num for s in states))
+    for s in states :
+        assert check[s.num].split_props == s.split_props
+
+def test_explicit_limit (termites) :
+    cg = termites()
+    assert cg.explicit(limit=1) is None
+
+def test_rules_restored (tmp_path, termites) :
+    # graphs saved without the rules get them from the model
+    store = SessionStore(tmp_path)
+    cg = termites()
+    store.save(cg, "base")
+    index = tmp_path / "graphs.jsonl"
+    record = json.loads(index.read_text())
+    del record["lts"]["rules"]
+    index.write_text(json.dumps(record) + "\n")
+    new = SessionStore(tmp_path).load("base")
+    assert new.lts.rules == termites.lts_rules()
+    nodes, edges = new.explicit_states(limit=64)
+    assert len(nodes) <= 64 + len(new)
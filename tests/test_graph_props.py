@@ -0,0 +1,26 @@
+import pytest
+
+pytest.importorskip("ddd")
+pytest.importorskip("its")
+
+from ecco.rr.lts import GRAPH_PROPS
+
+def test_graph_props_many (termites) :
+    cg = termites().split("Sd").split("Wk")
+    lts = cg.lts
+    parts = ([c.states for c in cg.components]
+             + [lts.states, lts.init, lts.dead, lts.hull, lts.states.pick()])
+    many = lts.graph_props_many(parts)
+    assert len(many) == len(parts)
+    for states, props in zip(parts, many) :
+        assert set(props) == set(GRAPH_PROPS)
+        for name, value in props.items() :
+            assert value == getattr(lts, name)(states), name
+        assert lts.graph_props(states) == props
+
+def test_names (termites) :
+    lts = termites().lts
+    names = ["is_dead", "is_scc"]
+    found = lts.graph_props_many([lts.states, lts.hull], names)
+    assert all(list(f) == names for f in found)
+    assert found[1]["is_scc"] == lts.is_scc(lts.hull)
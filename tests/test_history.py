@@ -0,0 +1,52 @@
+import gc
+
+import pytest
+
+pytest.importorskip("ddd")
+pytest.importorskip("its")
+
+def test_undo (termites) :
+    cg = termites()
+    sd = cg.split("Sd")
+    wk = sd.split("Wk")
+    assert wk.history() == ["split('Sd')", "split('Wk')"]
+    assert wk.undo() is sd
+    assert wk.undo(2) is cg
+    assert wk.parent is sd
+    with pytest.raises(ValueError) :
+        wk.undo(3)
+    with pytest.raises(ValueError) :
+        cg.undo()
+
+def test_inplace_steps (termites) :
+    cg = termites()
+    cg.check("Sd")
+    cg.tag("mark")
+    sd = cg.split("Wk")
+    sd.forget("Sd")
+    assert sd.history() == ["check('Sd')", "tag('mark')", "split('Wk')",
+                            "forget('Sd')"]
+    # in-place steps are not undone
+    assert sd.undo() is cg
+    with pytest.raises(ValueError) :
+        cg.undo()
+
+def test_freed_parent (termites) :
+    new = termites().split("Sd").split("Wk")
+    gc.collect()
+    assert new.parent is None
+    with pytest.raises(ValueError) :
+        new.undo()
+
+def test_branch (termites) :
+    cg = termites()
+    left = cg.branch().split("Sd")
+    right = cg.branch()
+    right.check("Sd")
+    # checks on the branches do not leak to the original graph
+    assert all("Sd" not in c.split_props for c in cg.components)
+    assert left.undo(2) is cg
+    assert right.history() == ["branch()", "check('Sd')"]
+    cg.snapshot("base")
+    assert right.restore("base") is cg
+    assert "base" in left.snapshots
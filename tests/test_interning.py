@@ -0,0 +1,49 @@
+import gc, json
+
+import pytest
+
+pytest.importorskip("ddd")
+pytest.importorskip("its")
+
+from ecco.rr.lts import Component, interning_stats
+from ecco.rr.store import SessionStore
+
+def test_same_states (termites) :
+    cg = termites()
+    c = cg.components[0]
+    assert Component(cg.lts, c.states).num == c.num
+    assert c.copy().num == c.num
+    stats = cg.interning_stats()
+    assert stats == interning_stats()
+    assert stats["components"] >= len(cg)
+    assert stats["instances"] >= stats["components"]
+    assert stats["next"] > max(c.num for c in cg.components)
+
+def test_load_collision (tmp_path, termites) :
+    store = SessionStore(tmp_path)
+    cg = termites().split("Sd")
+    cg.g
+    store.save(cg, "sd")
+    count = len(cg.edges)
+    # the saved numbers are not used anymore
+    del cg
+    gc.collect()
+    other = termites(init="*")
+    # make the saved numbers collide with those of other components
+    index = tmp_path / "graphs.jsonl"
+    record = json.loads(index.read_text())
+    renum = {d["num"] : o.num for d, o in zip(record["components"],
+                                              other.components)}
+    for dump in record["components"] :
+        dump["num"] = renum.get(dump["num"], dump["num"])
+    record["edges"] = [[renum.get(s, s), renum.get(d, d), r]
+                       for s, d, r in record["edges"]]
+    record["name"] = "collide"
+    with open(index, "a") as out :
+        out.write(json.dumps(record) + "\n")
+    new = SessionStore(tmp_path).load("collide")
+    nums = {c.num for c in new.components}
+    assert len(nums) == len(new)
+    assert not nums & {o.num for o in other.components}
+    assert all(s in nums and d in nums for s, d in new._edges()[0])
+    assert len(new.edges) == count
@@ -0,0 +1,58 @@
+import pytest
+
+pytest.importorskip("ddd")
+pytest.importorskip("its")
+
+from ecco.rr import ComponentGraph, setrel
+
+@pytest.fixture
+def saved (tmp_path, termites) :
+    cg = termites().split("Sd")
+    cg.check("Wk")
+    cg.g
+    path = str(tmp_path / "graph.ecco")
+    cg.save(path)
+    return cg, path
+
+def test_lazy_tables (saved) :
+    cg, path = saved
+    new = ComponentGraph.load(path, lazy=True)
+    assert len(new) == len(cg)
+    nodes = new.nodes
+    edges = new.edges
+    assert set(nodes.index) == set(cg.nodes.index)
+    assert set(edges.index) == set(cg.edges.index)
+    for rel in setrel :
+        assert set(new("Sd", rel)) == set(cg("Sd", rel))
+        assert set(new("Wk", rel)) == set(cg("Wk", rel))
+    new.n("Sd")
+    assert new._loader is not None
+    # an unknown property requires the components
+    new("Te")
+    assert new._loader is None
+    assert set(new("Te")) == set(cg("Te"))
+
+def test_basins_index (termites) :
+    cg = termites()
+    dead = [c.num for c in cg.components
+            if c.states and (c.states & cg.lts.dead) == c.states]
+    if not dead :
+        pytest.skip("no deadlock")
+    new = cg.split_basins(*(c.num for c in cg.components if c.num not in dead),
+                          dead)
+    for d in dead :
+        prop = f"basin({d})"
+        for c in new.components :
+            if prop in c.split_props :
+                assert c.num in new(prop, c.split_props[prop], strict=True)
+
+def test_lazy_without_edges (tmp_path, termites) :
+    cg = termites().split("Sd")
+    path = str(tmp_path / "graph.ecco")
+    cg.save(path)
+    new = ComponentGraph.load(path, lazy=True)
+    assert set(new.nodes.index) == set(cg.nodes.index)
+    assert new._loader is not None
+    # edges were not saved, so they are computed from the components
+    assert set(new.edges.index) == set(cg.edges.index)
+    assert new._loader is None
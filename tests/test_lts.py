@@ -0,0 +1,18 @@
+import pytest
+
+pytest.importorskip("ddd")
+pytest.importorskip("its")
+
+@pytest.mark.parametrize("compact", [False, True])
+@pytest.mark.parametrize("cluster", [1, 3])
+def test_clusters (termites, compact, cluster) :
+    mono = termites(compact=compact, split=False).lts
+    part = termites(compact=compact, split=False, cluster=cluster).lts
+    names = [t for c in part.clusters for t in c]
+    assert sorted(names) == sorted(mono.tsucc)
+    assert all(0 < len(c) <= cluster for c in part.clusters)
+    assert part.states == mono.states
+    assert part.hull == mono.hull
+    assert part.dead == mono.dead
+    assert part.succ_s(part.init) == mono.succ_s(mono.init)
+    assert part.pred_s(part.dead) == mono.pred_s(mono.dead)
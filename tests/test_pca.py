@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip("ddd")
+pytest.importorskip("its")
+pytest.importorskip("prince")
+
+def _fit (cg) :
+    # the only cached PCA fit
+    (fit, _), = cg._fits.values()
+    return fit
+
+def test_cache (termites) :
+    cg = termites().split("Sd").split("Wk")
+    first = cg.pca()
+    fit = _fit(cg)
+    assert (cg.pca() == first).all().all()
+    assert _fit(cg) is fit
+    # other components are another analysis
+    nums = [c.num for c in cg.components][:3]
+    cg.pca(*nums)
+    assert len(cg._fits) == 2
+
+def test_reuse (termites) :
+    cg = termites().split("Sd")
+    cg.pca()
+    fit = _fit(cg)
+    new = cg.split("Wk")
+    # by default, a new fit is computed for the derived graph
+    fresh = new.branch()
+    fresh._fits.clear()
+    assert (new.pca() == fresh.pca()).all().all()
+    assert _fit(new) is not fit
+    # stale fits are reused on demand
+    other = cg.split("Wk")
+    other.pca(reuse=1.0)
+    assert _fit(other) is fit
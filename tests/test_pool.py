@@ -0,0 +1,34 @@
+import multiprocessing, os
+
+import pytest
+
+pytest.importorskip("ddd")
+
+from ecco.rr import pool
+
+def _pid (context, n) :
+    return context, n, os.getpid()
+
+def _nested (context, n) :
+    # called in a worker, that cannot fork its own workers
+    return [pid for _, _, pid in pool.imap(_pid, context, [(i,) for i in range(3)], 2)]
+
+def test_imap () :
+    jobs = [(n,) for n in range(8)]
+    found = list(pool.imap(_pid, "ctx", jobs, 2))
+    assert [(c, n) for c, n, _ in found] == [("ctx", n) for n in range(8)]
+    assert pool._context is None
+    serial = list(pool.imap(_pid, "ctx", jobs, 1))
+    assert {pid for _, _, pid in serial} == {os.getpid()}
+
+def test_nested () :
+    if pool.workers(2) < 2 :
+        return
+    for pids in pool.imap(_nested, None, [(n,) for n in range(2)], 2) :
+        assert len(set(pids)) == 1
+        assert os.getpid() not in pids
+
+def test_workers () :
+    assert pool.workers(3) in (1, 3)
+    assert pool.workers(None) >= 1
+    assert not multiprocessing.current_process().daemon
@@ -0,0 +1,35 @@
+import pytest
+
+pytest.importorskip("ddd")
+pytest.importorskip("its")
+
+from ecco.rr import setrel
+
+@pytest.mark.parametrize("key", ["props", "onoff"])
+def test_quotient (termites, key) :
+    cg = termites().split("Sd").split("Wk")
+    cg.check("Te")
+    cg.g
+    q = cg.quotient(key)
+    assert len(q) <= len(cg)
+    union = q.components[0].states
+    for c in q.components :
+        union = union | c.states
+        # derived properties are those of the merged states
+        for prop, rel in c.split_props.items() :
+            pstates = q.lts.props[prop]
+            if rel == setrel.HASNO :
+                assert not (c.states & pstates)
+            elif rel == setrel.EQUALS :
+                assert c.states == pstates
+            elif rel == setrel.ISIN :
+                assert c.states < pstates
+            elif rel == setrel.CONTAINS :
+                assert c.states > pstates
+        on, off = c.on_off()
+        assert set(c.on) == set(on) and set(c.off) == set(off)
+    assert union == cg.lts.states
+    # derived edges are those computed from the states
+    fresh = q.branch()
+    fresh._known_edges = None
+    assert set(q.edges.index) == set(fresh.edges.index)
@@ -0,0 +1,37 @@
+import pytest
+
+pytest.importorskip("ddd")
+pytest.importorskip("its")
+
+import numpy as np
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_rule_stats (termites, compact) :
+    cg = termites(compact=compact)
+    lts = cg.lts
+    stats = cg.rule_stats()
+    assert set(stats.index) == set(lts.tsucc)
+    assert any(t.startswith("C") for t in stats.index) != compact
+    mat = lts.matrix(lts.states)
+    col = {v : i for i, v in enumerate(lts.vars)}
+    for t, row in stats.iterrows() :
+        left, _ = lts.rules.get(t, ({}, {}))
+        en = np.ones(len(mat), dtype=bool)
+        for v, b in left.items() :
+            en &= mat[:,col[v]] == b
+        assert row["enabled"] == en.sum()
+        assert row["effective"] == len(lts.tpred[t](lts.states))
+        assert row["effective"] <= row["enabled"]
+        assert 0 < row["components"] <= len(cg) or row["enabled"] == 0
+
+def test_empty_parts (termites) :
+    lts = termites().lts
+    empty = lts.states - lts.states
+    stats = lts.rule_stats([lts.states, empty])
+    assert (stats["components"] == (stats["enabled"] > 0)).all()
+
+def test_no_rules (termites) :
+    from ecco.rr.lts import LTS
+    lts = LTS(termites.gal(showlog=False))
+    with pytest.raises(ValueError) :
+        lts.rule_stats()
@@ -0,0 +1,25 @@
+import pytest
+
+pytest.importorskip("ddd")
+pytest.importorskip("its")
+
+import pandas as pd
+
+def test_scan_overlapping (termites) :
+    scenarios = pd.DataFrame([{"Rp" : "+", "Ac" : ""},
+                              {"Rp" : "*", "Ac" : ""},
+                              {"Rp" : "+", "Ac" : ""},
+                              {"Rp" : "*", "Ac" : "*"},
+                              {"Rp" : "-", "Ac" : "-"}])
+    table = termites.scan(scenarios, processes=1)
+    assert list(table.index) == list(scenarios.index)
+    # identical scenarios
+    assert (table.iloc[0].drop("init") == table.iloc[2].drop("init")).all()
+    # included scenarios
+    assert table.iloc[0]["states"] <= table.iloc[1]["states"] <= table.iloc[3]["states"]
+    for (_, row), (_, scn) in zip(table.iterrows(), scenarios.iterrows()) :
+        lts = termites(init=row["init"], split=False).lts
+        assert row["states"] == len(lts.states)
+        assert row["dead"] == len(lts.dead)
+        assert row["hull"] == len(lts.hull)
+        assert row["attractors"] == len(lts.attractors())
@@ -0,0 +1,63 @@
+import multiprocessing
+
+import pytest
+
+pytest.importorskip("ddd")
+pytest.importorskip("its")
+
+from ecco.rr.store import SessionStore
+
+def test_roundtrip (tmp_path, termites) :
+    store = SessionStore(tmp_path)
+    cg = termites().split("Sd")
+    cg.g
+    store.save(cg, "sd")
+    assert "sd" in store
+    assert list(store) == ["sd"]
+    info = store.info("sd")
+    assert info["size"] == len(cg)
+    assert info["history"] == cg.history()
+    new = SessionStore(tmp_path).load("sd")
+    assert {c.num : c.states for c in new.components} \
+        == {c.num : c.states for c in cg.components}
+    assert new.lts.states == cg.lts.states
+    assert new.history() == cg.history()
+    assert new._edges()[0] == cg._edges()[0]
+    with pytest.raises(KeyError) :
+        store.load("missing")
+
+def test_dedup (tmp_path, termites) :
+    store = SessionStore(tmp_path)
+    cg = termites()
+    store.save(cg, "base")
+    count = len(list((tmp_path / "ddd").iterdir()))
+    # saving the same graph again writes no DDD
+    store.save(cg, "again")
+    assert len(list((tmp_path / "ddd").iterdir())) == count
+    # a derived graph writes only its new components
+    new = cg.split("Sd")
+    store.save(new, "sd")
+    added = len(list((tmp_path / "ddd").iterdir())) - count
+    fresh = {c.num for c in new.components} - {c.num for c in cg.components}
+    assert 0 < added <= 2 * len(fresh) + 1
+    # saving under an existing name hides the previous graph
+    store.save(new, "base")
+    assert store.info("base")["size"] == len(new)
+    assert len(store) == 3
+
+_graph = None
+
+def _save (path, name) :
+    # called in forked processes, that inherit _graph
+    SessionStore(path).save(_graph, name)
+
+def test_concurrent (tmp_path, termites) :
+    global _graph
+    _graph = termites()
+    names = [f"graph{i}" for i in range(8)]
+    with multiprocessing.get_context("fork").Pool(4) as pool :
+        pool.starmap(_save, [(str(tmp_path), n) for n in names])
+    store = SessionStore(tmp_path)
+    assert sorted(store) == sorted(names)
+    for n in names :
+        assert len(store.load(n)) == len(_graph)
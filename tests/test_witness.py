@@ -0,0 +1,27 @@
+import pytest
+
+pytest.importorskip("ddd")
+pytest.importorskip("its")
+
+def test_witness (termites) :
+    cg = termites()
+    lts = cg.lts
+    for props, init in ((["Sd", "Wk"], False), (["Sd"], True)) :
+        trace = cg.witness(*props, init=init)
+        if trace is None :
+            continue
+        assert list(trace["visited"]) == sorted(trace["visited"])
+        assert trace["visited"].iloc[-1] == len(props)
+        assert all(trace["rule"].iloc[1:] != "")
+        nums = {c.num for c in cg.components}
+        assert set(trace["component"]) <= nums
+
+def test_search (termites) :
+    cg = termites()
+    new, path = cg.search("Sd", "Wk", prune=False)
+    assert path[0] == "Sd" and path[-1] == "Wk"
+    for part in path[1::2] :
+        for u, v in zip(part, part[1:]) :
+            assert new.g.get_eid(u, v, error=False) >= 0
+    pruned, again = cg.search("Sd", "Wk")
+    assert len(pruned) <= len(new)